@@ -0,0 +1,252 @@
+"""Asynchronous product lookups for high-concurrency callers.
+
+AsyncProductLookup mirrors BarcodeScanner.get_product_info as a coroutine,
+using the same barcode type dispatch, response parsing and product cache.
+HTTP calls run on the scanner's pooled session in a small thread pool, as
+do product cache reads and writes, so the event loop never blocks. Retries
+back off with asyncio.sleep, each host has a concurrency limit, and a 429
+pauses every in-flight request to that host until its Retry-After has
+passed.
+
+    lookup = AsyncProductLookup()
+    results = lookup.lookup_many(['4006381333931', '012345678905'])
+"""
+import asyncio
+import functools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from lazy_imports import lazy_import
+from scanner_core import BarcodeScanner, NOT_FOUND_ERRORS, parse_retry_after
+from metrics import metrics
+
+requests = lazy_import('requests')
+
+logger = logging.getLogger(__name__)
+
+
+class _HostState:
+    """Concurrency limit and shared rate-limit pause for one upstream host"""
+
+    def __init__(self, limit):
+        self.semaphore = asyncio.Semaphore(limit)
+        self.blocked_until = 0.0  # event loop time before which no request may start
+
+
+class AsyncProductLookup:
+    """Coroutine counterpart of BarcodeScanner.get_product_info"""
+
+    def __init__(self, scanner=None, per_host_limit=None):
+        self.scanner = scanner or BarcodeScanner()
+        self.per_host_limit = per_host_limit or self.scanner.pool_size
+        self._executor = ThreadPoolExecutor(max_workers=self.per_host_limit * 4,
+                                            thread_name_prefix='async-lookup')
+        # Waiting for a shared rate limit token blocks a thread; keep that off the HTTP pool
+        self._limiter_executor = ThreadPoolExecutor(max_workers=self.per_host_limit * 4,
+                                                    thread_name_prefix='async-rate-limit')
+        self._hosts = {}
+        self._loop = None
+
+    async def get_product_info(self, barcode, barcode_type=None):
+        """Retrieve product information without blocking the event loop"""
+        scanner = self.scanner
+        loop = asyncio.get_running_loop()
+        try:
+            # Cache and offline database reads are SQLite queries; keep them off the event loop
+            barcode, barcode_type, cache_key, result = await loop.run_in_executor(
+                self._executor, scanner._begin_lookup, barcode, barcode_type)
+            if result is not None:
+                return result
+
+            handler = self._api_handlers().get(barcode_type, self._handle_unknown)
+            result = await handler(barcode)
+            await loop.run_in_executor(self._executor, scanner._finish_lookup, cache_key, result)
+            logger.info(f"Successfully retrieved product info for {barcode_type} barcode: {barcode}")
+            return result
+
+        except Exception as e:
+            return scanner._lookup_error(e, barcode, barcode_type)
+
+    async def get_many(self, barcodes, barcode_type=None):
+        """Resolve many barcodes concurrently; returns a dict keyed by barcode"""
+        unique = list(dict.fromkeys(barcodes))
+        results = await asyncio.gather(*(self.get_product_info(b, barcode_type) for b in unique))
+        return dict(zip(unique, results))
+
+    def lookup_many(self, barcodes, barcode_type=None):
+        """Blocking wrapper around get_many for callers without an event loop"""
+        return asyncio.run(self.get_many(barcodes, barcode_type))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self._limiter_executor.shutdown(wait=False)
+
+    def _api_handlers(self):
+        """Async handlers matching BarcodeScanner._api_handlers"""
+        return {
+            'EAN13': self._handle_ean13,
+            'UPC_A': self._handle_upc_a,
+            'CODE128': self._handle_code128,
+            'QRCODE': self._handle_qrcode,
+            'CODE39': self._handle_code39
+        }
+
+    async def _handle_ean13(self, barcode):
+        url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
+        return await self._make_api_request(url, 'EAN-13')
+
+    async def _handle_upc_a(self, barcode):
+        # Convert UPC-A to EAN-13 by adding '0' prefix
+        return await self._handle_ean13('0' + barcode)
+
+    async def _handle_code128(self, barcode):
+        endpoints = self.scanner._code128_endpoints(barcode)
+        errors = {}
+
+        if self.scanner.lookup_mode == 'concurrent':
+            tasks = {
+                asyncio.ensure_future(self._make_api_request(e['url'], 'CODE128')): e['name']
+                for e in endpoints
+            }
+            try:
+                for next_done in asyncio.as_completed(tasks):
+                    result = await next_done
+                    if 'error' not in result:
+                        return result
+            finally:
+                for task in tasks:
+                    task.cancel()
+            for task, name in tasks.items():
+                if task.done() and not task.cancelled():
+                    errors[name] = task.result()['error']
+        else:
+            for endpoint in endpoints:
+                result = await self._make_api_request(endpoint['url'], 'CODE128')
+                if result.get('error') not in NOT_FOUND_ERRORS:
+                    return result
+                errors[endpoint['name']] = result['error']
+
+        return {
+            'error': 'Product not found in any database',
+            'details': {
+                'barcode': barcode,
+                'type': 'CODE128',
+                'attempted_apis': [e['name'] for e in endpoints],
+                'errors': errors
+            }
+        }
+
+    async def _handle_qrcode(self, barcode):
+        return self.scanner._handle_qrcode(barcode)
+
+    async def _handle_code39(self, barcode):
+        return self.scanner._handle_code39(barcode)
+
+    async def _handle_unknown(self, barcode):
+        return self.scanner._handle_unknown(barcode)
+
+    def _host_state(self, url):
+        """Per-host limiter, recreated when called from a new event loop"""
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._hosts = {}
+        host = urlsplit(url).netloc
+        if host not in self._hosts:
+            self._hosts[host] = _HostState(self.per_host_limit)
+        return self._hosts[host]
+
+    async def _wait_for_host(self, state):
+        """Sleep until the host's rate-limit pause (if any) is over"""
+        loop = asyncio.get_running_loop()
+        delay = state.blocked_until - loop.time()
+        while delay > 0:
+            await asyncio.sleep(delay)
+            delay = state.blocked_until - loop.time()
+
+    def _backoff(self, attempt):
+        """Exponential backoff with jitter, in seconds"""
+        return self.scanner.retry_delay * (2 ** attempt) * (0.5 + random.random())
+
+    async def _make_api_request(self, url, barcode_type):
+        """Async API request with backoff, per-host limits and shared 429 handling"""
+        scanner = self.scanner
+        loop = asyncio.get_running_loop()
+        state = self._host_state(url)
+        get = functools.partial(scanner.session.get, url, timeout=scanner.api_timeout)
+        error_msg = 'Failed to retrieve product information after multiple attempts'
+
+        host = urlsplit(url).netloc
+
+        for attempt in range(scanner.max_retries):
+            if attempt > 0:
+                metrics.inc('lookup_api_retries_total', host=host)
+            await self._wait_for_host(state)
+            async with state.semaphore:
+                # Another request may have been rate limited while we queued
+                await self._wait_for_host(state)
+                if scanner.rate_limiter is not None:
+                    cancel_event = threading.Event()
+                    try:
+                        acquired = await loop.run_in_executor(self._limiter_executor, scanner.rate_limiter.acquire,
+                                                              host, scanner.rate_limit_wait, cancel_event)
+                    except asyncio.CancelledError:
+                        # Stop the waiting thread too, or it takes a token nobody uses
+                        cancel_event.set()
+                        raise
+                    if not acquired:
+                        return {'error': 'Rate limit exceeded'}
+                try:
+                    start = time.perf_counter()
+                    response = await loop.run_in_executor(self._executor, get)
+                    metrics.observe('lookup_api_seconds', time.perf_counter() - start,
+                                    host=host, status=response.status_code)
+                except requests.exceptions.Timeout:
+                    metrics.inc('lookup_api_errors_total', host=host, error='timeout')
+                    logger.warning(f"API request timed out (attempt {attempt + 1})")
+                    error_msg = 'API request timed out'
+                    response = None
+                except requests.exceptions.ConnectionError:
+                    metrics.inc('lookup_api_errors_total', host=host, error='connection')
+                    logger.error(f"Connection error (attempt {attempt + 1})")
+                    error_msg = 'Connection error'
+                    response = None
+                except requests.exceptions.RequestException as e:
+                    return {'error': f"Request error: {str(e)}"}
+
+            if response is not None:
+                if response.status_code == 200:
+                    try:
+                        data = response.json()
+                    except ValueError as e:
+                        # requests' JSON error is a RequestException, so this matches the sync path
+                        return {'error': f"Request error: {str(e)}"}
+                    return scanner._parse_product_data(data, barcode_type)
+
+                if response.status_code == 404:
+                    logger.warning("Product not found in database. Status code: 404")
+                    return {'error': 'Product not found in database'}
+
+                if response.status_code == 429:
+                    # Pause every request to this host, not just this one
+                    metrics.inc('lookup_api_rate_limited_total', host=host)
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'), scanner.retry_delay)
+                    logger.warning(f"Rate limited. Pausing {host} for {retry_after:g} seconds")
+                    state.blocked_until = max(state.blocked_until, loop.time() + retry_after)
+                    if scanner.rate_limiter is not None:
+                        await loop.run_in_executor(self._limiter_executor, scanner.rate_limiter.block,
+                                                   host, retry_after)
+                    continue
+
+                error_msg = f'Unexpected status code: {response.status_code}'
+                logger.error(error_msg)
+
+            if attempt < scanner.max_retries - 1:
+                await asyncio.sleep(self._backoff(attempt))
+
+        logger.error(error_msg)
+        return {'error': error_msg}
@@ -0,0 +1,203 @@
+"""Headless batch scanning of image archives.
+
+Scans a directory, glob pattern or list of image paths in parallel across all
+cores and streams one result per image to a JSONL or CSV file as scans
+complete. Re-running with --resume skips images already present in the output.
+
+    python batch_scan.py photos/ --output results.jsonl --resume
+"""
+import argparse
+import csv
+import glob
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from ingest import load_gray
+from scan_worker import init_worker, worker_scanner
+
+logger = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp', '.tif', '.tiff', '.webp')
+OUTPUT_FIELDS = ['path', 'barcode', 'error', 'elapsed_ms']
+
+def collect_paths(inputs, recursive=False):
+    """Expand directories, glob patterns and file paths into a sorted list of images"""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*') if recursive else os.path.join(item, '*')
+            candidates = glob.glob(pattern, recursive=recursive)
+        elif any(c in item for c in '*?['):
+            candidates = glob.glob(item, recursive=True)
+        else:
+            candidates = [item]
+
+        for path in candidates:
+            if path.lower().endswith(IMAGE_EXTENSIONS) and os.path.isfile(path):
+                paths.add(os.path.normpath(path))
+    return sorted(paths)
+
+
+def _scan_one(path, min_side=None):
+    """Scan a single image file inside a worker process"""
+    start = time.perf_counter()
+    result = {'path': path, 'barcode': None, 'error': None}
+    try:
+        # Memory-mapped and decoded straight to grayscale
+        image = load_gray(path, min_side)
+        if image is None:
+            result['error'] = 'Could not read image'
+        else:
+            result['barcode'] = worker_scanner().scan_barcode(image)
+    except ImportError:
+        raise
+    except Exception as e:
+        result['error'] = str(e)
+    result['elapsed_ms'] = round(1000 * (time.perf_counter() - start), 2)
+    return result
+
+
+def scan_images(paths, workers=None, min_side=None):
+    """Scan images in a process pool and yield results as they complete"""
+    workers = workers or os.cpu_count() or 1
+    pending_paths = iter(paths)
+    # Keep a bounded number of tasks in flight so results stream out steadily
+    max_in_flight = workers * 4
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker) as executor:
+        in_flight = set()
+        for path in pending_paths:
+            in_flight.add(executor.submit(_scan_one, path, min_side))
+            if len(in_flight) >= max_in_flight:
+                break
+
+        while in_flight:
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+                next_path = next(pending_paths, None)
+                if next_path is not None:
+                    in_flight.add(executor.submit(_scan_one, next_path, min_side))
+
+
+def truncate_partial_line(output_path, block_size=65536):
+    """Cut a partially written last line (from a killed run) off the output file"""
+    if not os.path.exists(output_path):
+        return
+    with open(output_path, 'rb+') as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - block_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b'\n')
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            logger.warning(f"Dropping a partially written last line from {output_path}")
+            f.truncate(position)
+
+
+def load_completed(output_path, output_format):
+    """Return the set of image paths already recorded in an output file"""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+
+    with open(output_path, newline='') as f:
+        if output_format == 'csv':
+            for row in csv.DictReader(f):
+                completed.add(row['path'])
+        else:
+            for line in f:
+                try:
+                    completed.add(json.loads(line)['path'])
+                except (ValueError, KeyError):
+                    continue
+    return completed
+
+
+def run_batch(inputs, output_path, output_format='jsonl', workers=None, resume=False, recursive=False,
+              min_side=None):
+    """Scan all images matched by inputs and stream results to output_path
+
+    Returns a summary with counts, elapsed time and throughput in images/sec.
+    """
+    paths = collect_paths(inputs, recursive=recursive)
+    if resume:
+        # Appending after a partial line would merge it with the next record
+        truncate_partial_line(output_path)
+        completed = load_completed(output_path, output_format)
+        paths = [p for p in paths if p not in completed]
+        logger.info(f"Resuming: {len(completed)} images already scanned, {len(paths)} remaining")
+
+    write_header = output_format == 'csv' and not (resume and os.path.exists(output_path))
+    summary = {'images': 0, 'decoded': 0, 'errors': 0}
+    start = time.perf_counter()
+
+    with open(output_path, 'a' if resume else 'w', newline='') as f:
+        writer = None
+        if output_format == 'csv':
+            writer = csv.DictWriter(f, fieldnames=OUTPUT_FIELDS)
+            if write_header:
+                writer.writeheader()
+
+        for result in scan_images(paths, workers, min_side):
+            if writer:
+                writer.writerow(result)
+            else:
+                f.write(json.dumps(result) + '\n')
+            f.flush()
+
+            summary['images'] += 1
+            if result['barcode']:
+                summary['decoded'] += 1
+            if result['error']:
+                summary['errors'] += 1
+
+    elapsed = time.perf_counter() - start
+    summary['elapsed_s'] = round(elapsed, 2)
+    summary['images_per_sec'] = round(summary['images'] / elapsed, 2) if elapsed > 0 else 0.0
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scan barcodes in a batch of images")
+    parser.add_argument('inputs', nargs='*', help="Image files, directories or glob patterns")
+    parser.add_argument('--from-file', help="Read image paths from a file, one per line ('-' for stdin)")
+    parser.add_argument('--output', '-o', required=True, help="Output file (.jsonl or .csv)")
+    parser.add_argument('--format', choices=['jsonl', 'csv'], help="Output format (default: from extension)")
+    parser.add_argument('--workers', '-j', type=int, help="Worker processes (default: all cores)")
+    parser.add_argument('--recursive', '-r', action='store_true', help="Recurse into directories")
+    parser.add_argument('--resume', action='store_true', help="Skip images already in the output file")
+    parser.add_argument('--min-side', type=int,
+                        help="Decode large images at reduced size, keeping the shorter side at least this many pixels")
+    args = parser.parse_args(argv)
+
+    inputs = list(args.inputs)
+    if args.from_file:
+        if args.from_file == '-':
+            inputs.extend(line.strip() for line in sys.stdin if line.strip())
+        else:
+            with open(args.from_file) as source:
+                inputs.extend(line.strip() for line in source if line.strip())
+    if not inputs:
+        parser.error("no input images given")
+
+    output_format = args.format or ('csv' if args.output.lower().endswith('.csv') else 'jsonl')
+    summary = run_batch(inputs, args.output, output_format, args.workers, args.resume, args.recursive,
+                        args.min_side)
+    print(f"Scanned {summary['images']} images in {summary['elapsed_s']}s "
+          f"({summary['images_per_sec']} images/sec): {summary['decoded']} decoded, "
+          f"{summary['errors']} errors")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
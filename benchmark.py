@@ -0,0 +1,348 @@
+"""Benchmark harness for the decode pipeline.
+
+Generates a reproducible synthetic corpus of EAN-13, UPC-A, CODE128 and QR
+images offline. Each image varies resolution, module size, rotation, blur,
+noise, glare and inversion. The harness measures the scanner against that
+corpus: per-image latency percentiles, throughput and accuracy for the full
+pipeline, plus hit rate and latency of every individual decode strategy.
+Results are written as JSON so that runs can be compared.
+
+    python benchmark.py --count 200 --seed 1 --output bench.json
+    python benchmark.py --count 200 --seed 1 --output new.json --compare bench.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from scanner_core import BarcodeScanner, strategy_name
+
+logger = logging.getLogger(__name__)
+
+SYMBOLOGIES = ['EAN13', 'UPCA', 'CODE128', 'QRCODE']
+RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+# EAN-13 digit encodings (L, G and R sets) and first-digit parity patterns
+EAN_L = ['0001101', '0011001', '0010011', '0111101', '0100011',
+         '0110001', '0101111', '0111011', '0110111', '0001011']
+EAN_G = ['0100111', '0110011', '0011011', '0100001', '0011101',
+         '0111001', '0000101', '0010001', '0001001', '0010111']
+EAN_R = ['1110010', '1100110', '1101100', '1000010', '1011100',
+         '1001110', '1010000', '1000100', '1001000', '1110100']
+EAN_PARITY = ['LLLLLL', 'LLGLGG', 'LLGGLG', 'LLGGGL', 'LGLLGG',
+              'LGGLLG', 'LGGGLL', 'LGLGLG', 'LGLGGL', 'LGGLGL']
+
+# CODE128 bar/space widths for symbol values 0-106 (103-105 are Start A/B/C, 106 is Stop)
+CODE128_WIDTHS = [
+    '212222', '222122', '222221', '121223', '121322', '131222', '122213', '122312', '132212', '221213',
+    '221312', '231212', '112232', '122132', '122231', '113222', '123122', '123221', '223211', '221132',
+    '221231', '213212', '223112', '312131', '311222', '321122', '321221', '312212', '322112', '322211',
+    '212123', '212321', '232121', '111323', '131123', '131321', '112313', '132113', '132311', '211313',
+    '231113', '231311', '112133', '112331', '132131', '113123', '113321', '133121', '313121', '211331',
+    '231131', '213113', '213311', '213131', '311123', '311321', '331121', '312113', '312311', '332111',
+    '314111', '221411', '431111', '111224', '111422', '121124', '121421', '141122', '141221', '112214',
+    '112412', '122114', '122411', '142112', '142211', '241211', '221114', '413111', '241112', '134111',
+    '111242', '121142', '121241', '114212', '124112', '124211', '411212', '421112', '421211', '212141',
+    '214121', '412121', '111143', '111341', '131141', '114113', '114311', '411113', '411311', '113141',
+    '114131', '311141', '411131', '211412', '211214', '211232', '2331112'
+]
+CODE128_START_B = 104
+CODE128_STOP = 106
+
+
+def ean_check_digit(digits):
+    """Check digit for an EAN/UPC payload (without its check digit)"""
+    total = sum(int(d) * (3 if i % 2 == 0 else 1) for i, d in enumerate(reversed(digits)))
+    return str((10 - total % 10) % 10)
+
+
+def render_ean13(code):
+    """Render a 13-digit EAN-13 code as a 1-pixel-per-module bar row"""
+    bits = '101'
+    parity = EAN_PARITY[int(code[0])]
+    for i, digit in enumerate(code[1:7]):
+        bits += (EAN_L if parity[i] == 'L' else EAN_G)[int(digit)]
+    bits += '01010'
+    for digit in code[7:]:
+        bits += EAN_R[int(digit)]
+    bits += '101'
+    return np.array([0 if b == '1' else 255 for b in bits], np.uint8)
+
+
+def render_code128(text):
+    """Render printable ASCII text as a CODE128 (code set B) bar row"""
+    values = [CODE128_START_B] + [ord(c) - 32 for c in text]
+    checksum = (values[0] + sum(i * v for i, v in enumerate(values[1:], start=1))) % 103
+    values += [checksum, CODE128_STOP]
+
+    row = []
+    for value in values:
+        for i, width in enumerate(CODE128_WIDTHS[value]):
+            row.extend([0 if i % 2 == 0 else 255] * int(width))
+    return np.array(row, np.uint8)
+
+
+def render_symbol(symbology, data, module=4):
+    """Render a symbol as a grayscale image with a quiet zone"""
+    if symbology == 'QRCODE':
+        qr = cv2.QRCodeEncoder.create().encode(data)
+        qr = cv2.resize(qr, None, fx=module, fy=module, interpolation=cv2.INTER_NEAREST)
+        return cv2.copyMakeBorder(qr, 4 * module, 4 * module, 4 * module, 4 * module,
+                                  cv2.BORDER_CONSTANT, value=255)
+
+    row = render_code128(data) if symbology == 'CODE128' else render_ean13(
+        data if symbology == 'EAN13' else '0' + data)
+    row = np.repeat(row, module)
+    height = max(40, int(len(row) * 0.35))
+    image = np.tile(row, (height, 1))
+    quiet = 10 * module
+    return cv2.copyMakeBorder(image, quiet, quiet, quiet, quiet, cv2.BORDER_CONSTANT, value=255)
+
+
+def random_payload(rng, symbology):
+    """Random valid payload for a symbology"""
+    if symbology == 'EAN13':
+        digits = ''.join(str(d) for d in rng.integers(0, 10, 12))
+        return digits + ean_check_digit(digits)
+    if symbology == 'UPCA':
+        digits = ''.join(str(d) for d in rng.integers(0, 10, 11))
+        return digits + ean_check_digit(digits)
+    if symbology == 'CODE128':
+        return f"SKU-{int(rng.integers(0, 10 ** 8)):08d}"
+    return f"https://example.com/p/{int(rng.integers(0, 10 ** 6))}"
+
+
+def compose_scene(symbol_image, params, rng):
+    """Place a symbol on a background and apply the distortions in params"""
+    width, height = params['resolution']
+
+    # Scale from the rendered module size to the requested one
+    scale = params['module_px'] / 4.0
+    symbol = cv2.resize(symbol_image, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    # Rotate around the centre, padding with the label's white
+    if params['rotation']:
+        h, w = symbol.shape
+        matrix = cv2.getRotationMatrix2D((w / 2, h / 2), params['rotation'], 1.0)
+        cos, sin = abs(matrix[0, 0]), abs(matrix[0, 1])
+        new_w, new_h = int(h * sin + w * cos), int(h * cos + w * sin)
+        matrix[0, 2] += new_w / 2 - w / 2
+        matrix[1, 2] += new_h / 2 - h / 2
+        symbol = cv2.warpAffine(symbol, matrix, (new_w, new_h), borderValue=255)
+
+    # Shrink the symbol if it does not fit the frame
+    fit = min(1.0, 0.9 * width / symbol.shape[1], 0.9 * height / symbol.shape[0])
+    if fit < 1.0:
+        symbol = cv2.resize(symbol, None, fx=fit, fy=fit, interpolation=cv2.INTER_AREA)
+
+    background = rng.normal(params['background'], 20, (height, width)).clip(0, 255).astype(np.uint8)
+    background = cv2.GaussianBlur(background, (0, 0), 3)
+    h, w = symbol.shape
+    x = int(rng.integers(0, width - w + 1))
+    y = int(rng.integers(0, height - h + 1))
+    background[y:y + h, x:x + w] = symbol
+    scene = background.astype(np.float32)
+
+    if params['glare']:
+        yy, xx = np.mgrid[0:height, 0:width]
+        cx, cy = x + w * rng.random(), y + h * rng.random()
+        radius = max(w, h) / 2
+        scene += 255 * params['glare'] * np.exp(-((xx - cx) ** 2 + (yy - cy) ** 2) / (2 * radius ** 2))
+    if params['blur']:
+        scene = cv2.GaussianBlur(scene, (0, 0), params['blur'])
+    if params['noise']:
+        scene += rng.normal(0, params['noise'], scene.shape)
+
+    scene = scene.clip(0, 255).astype(np.uint8)
+    if params['inverted']:
+        scene = 255 - scene
+    return cv2.cvtColor(scene, cv2.COLOR_GRAY2BGR), (x, y, w, h)
+
+
+def generate_corpus(count, seed=0):
+    """Yield (image, truth) pairs; the same seed always gives the same corpus"""
+    rng = np.random.default_rng(seed)
+    for index in range(count):
+        symbology = SYMBOLOGIES[index % len(SYMBOLOGIES)]
+        data = random_payload(rng, symbology)
+        params = {
+            'resolution': RESOLUTIONS[int(rng.integers(len(RESOLUTIONS)))],
+            'module_px': float(rng.choice([1.5, 2.0, 3.0, 4.0])),
+            'rotation': float(rng.choice([0, 0, 0, 5, 15, 90, 180, 270, 33])),
+            'blur': float(rng.choice([0, 0, 0.8, 1.5])),
+            'noise': float(rng.choice([0, 0, 6, 12])),
+            'glare': float(rng.choice([0, 0, 0, 0.4])),
+            'inverted': bool(rng.random() < 0.1),
+            'background': float(rng.uniform(60, 200))
+        }
+        image, bbox = compose_scene(render_symbol(symbology, data), params, rng)
+        yield image, {'index': index, 'symbology': symbology, 'data': data, 'bbox': bbox, 'params': params}
+
+
+def is_match(truth, data):
+    """Whether a decoded string matches the ground truth (UPC-A may decode as EAN-13)"""
+    return data == truth['data'] or (truth['symbology'] == 'UPCA' and data == '0' + truth['data'])
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ms = np.array(values) * 1000
+    return {
+        'mean_ms': round(float(ms.mean()), 3),
+        'p50_ms': round(float(np.percentile(ms, 50)), 3),
+        'p90_ms': round(float(np.percentile(ms, 90)), 3),
+        'p99_ms': round(float(np.percentile(ms, 99)), 3),
+        'max_ms': round(float(ms.max()), 3)
+    }
+
+
+def run_benchmark(count=100, seed=0, per_strategy=True, corpus_dir=None):
+    """Run the pipeline and (optionally) every single strategy over the corpus"""
+    scanner = BarcodeScanner()
+    latencies = []
+    hits = 0
+    by_symbology = {s: {'images': 0, 'hits': 0} for s in SYMBOLOGIES}
+    strategies = {strategy_name(*s): {'hits': 0, 'latencies': []} for s in scanner.strategy_scheduler.strategies}
+    manifest = []
+
+    started = time.perf_counter()
+    pipeline_time = 0.0
+    for image, truth in generate_corpus(count, seed):
+        if corpus_dir:
+            path = os.path.join(corpus_dir, f"{truth['index']:05d}_{truth['symbology']}.png")
+            cv2.imwrite(path, image)
+            manifest.append(dict(truth, path=path))
+
+        start = time.perf_counter()
+        symbols = scanner.scan_all(image)
+        elapsed = time.perf_counter() - start
+        pipeline_time += elapsed
+        latencies.append(elapsed)
+
+        found = any(is_match(truth, s['data']) for s in symbols)
+        hits += found
+        by_symbology[truth['symbology']]['images'] += 1
+        by_symbology[truth['symbology']]['hits'] += found
+
+        if per_strategy:
+            _measure_strategies(scanner, image, truth, strategies)
+
+    report = {
+        'meta': {
+            'count': count,
+            'seed': seed,
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'opencv': cv2.__version__,
+            'machine': platform.machine(),
+            'wall_s': round(time.perf_counter() - started, 3)
+        },
+        'pipeline': dict(
+            percentiles(latencies),
+            accuracy=round(hits / count, 4) if count else 0.0,
+            images_per_sec=round(count / pipeline_time, 3) if pipeline_time else 0.0,
+            by_symbology={
+                s: round(v['hits'] / v['images'], 4) if v['images'] else None
+                for s, v in by_symbology.items()
+            }
+        ),
+        'strategies': {
+            name: dict(percentiles(v['latencies']),
+                       accuracy=round(v['hits'] / count, 4) if count else 0.0)
+            for name, v in strategies.items()
+        } if per_strategy else {}
+    }
+
+    if corpus_dir:
+        with open(os.path.join(corpus_dir, 'manifest.json'), 'w') as f:
+            json.dump(manifest, f, indent=2)
+    return report
+
+
+def _measure_strategies(scanner, image, truth, strategies):
+    """Time every strategy on its own, charging each its preprocessing cost"""
+    if image.shape[1] < 640:
+        image = cv2.resize(image, None, fx=640 / image.shape[1], fy=640 / image.shape[1])
+
+    prepared = {}
+    prep_time = {}
+    for strategy in scanner.strategy_scheduler.strategies:
+        preprocessor = strategy[0]
+        if preprocessor not in prepared:
+            start = time.perf_counter()
+            prepared[preprocessor] = scanner._apply_preprocessor(image, preprocessor, {})
+            prep_time[preprocessor] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        symbols = scanner._try_strategy(image, strategy, prepared)
+        elapsed = time.perf_counter() - start + prep_time[preprocessor]
+
+        entry = strategies[strategy_name(*strategy)]
+        entry['latencies'].append(elapsed)
+        entry['hits'] += any(is_match(truth, s['data']) for s in symbols)
+
+
+def compare_reports(old, new, tolerance=0.05):
+    """Print metric changes between two reports; returns True if nothing regressed"""
+    ok = True
+    rows = [('pipeline', k) for k in ('p50_ms', 'p90_ms', 'p99_ms', 'images_per_sec', 'accuracy')]
+    for section, key in rows:
+        before, after = old[section].get(key), new[section].get(key)
+        if before is None or after is None:
+            continue
+        change = (after - before) / before if before else 0.0
+        # Latency should not go up; throughput and accuracy should not go down
+        worse = change > tolerance if key.endswith('_ms') else change < -tolerance
+        ok = ok and not worse
+        flag = '  REGRESSION' if worse else ''
+        print(f"{section}.{key:15s} {before:>10} -> {after:>10} ({change:+.1%}){flag}")
+
+    for name, after in new.get('strategies', {}).items():
+        before = old.get('strategies', {}).get(name)
+        if before and after['accuracy'] < before['accuracy'] - tolerance:
+            ok = False
+            print(f"strategies.{name} accuracy {before['accuracy']} -> {after['accuracy']}  REGRESSION")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the barcode decode pipeline on a synthetic corpus")
+    parser.add_argument('--count', type=int, default=100, help="Images in the synthetic corpus")
+    parser.add_argument('--seed', type=int, default=0, help="Corpus random seed")
+    parser.add_argument('--output', '-o', default='bench.json', help="Where to write the JSON report")
+    parser.add_argument('--compare', help="Previous report to compare against (non-zero exit on regression)")
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help="Relative change treated as a regression in --compare")
+    parser.add_argument('--save-corpus', help="Also write the corpus images and a manifest to this directory")
+    parser.add_argument('--skip-strategies', action='store_true', help="Only benchmark the full pipeline")
+    args = parser.parse_args(argv)
+
+    logging.getLogger('scanner_core').setLevel(logging.ERROR)
+    if args.save_corpus:
+        os.makedirs(args.save_corpus, exist_ok=True)
+
+    report = run_benchmark(args.count, args.seed, not args.skip_strategies, args.save_corpus)
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    pipeline = report['pipeline']
+    print(f"{args.count} images: accuracy {pipeline['accuracy']:.1%}, "
+          f"p50 {pipeline['p50_ms']} ms, p90 {pipeline['p90_ms']} ms, "
+          f"{pipeline['images_per_sec']} images/sec")
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            return 0 if compare_reports(json.load(f), report, args.tolerance) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
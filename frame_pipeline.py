@@ -0,0 +1,218 @@
+"""Producer/consumer pipeline for continuous webcam decoding.
+
+A capture thread reads frames as fast as the camera delivers them into a
+small drop-oldest queue, so decoders always see a recent frame and stale
+ones are discarded rather than piling up. A persistent pool of decode
+workers pulls from that queue at a configurable target rate, which bounds
+CPU use while letting the first decode happen within about one frame time.
+
+Each frame's scan runs under a ScanDeadline: it is abandoned once it has
+taken scan_timeout seconds, once a scan of a newer frame has finished (its
+answer would already be stale), or when the pipeline is stopped, so no
+decode keeps running after the webcam view has moved on. A newer scan that
+only searched tracked regions does not cancel older ones, so a tracker's
+periodic full-frame search still gets to finish.
+"""
+import logging
+import queue
+import threading
+import time
+from collections import deque
+
+from scanner_core import ScanDeadline
+
+logger = logging.getLogger(__name__)
+
+
+class FrameQueue:
+    """Bounded queue that drops the oldest frame when full"""
+
+    def __init__(self, maxsize=2):
+        self._frames = deque(maxlen=maxsize)
+        self._cond = threading.Condition()
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._frames) == self._frames.maxlen:
+                self.dropped += 1
+            self._frames.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        """Return the newest frame, waiting up to timeout; None if none arrived"""
+        with self._cond:
+            if not self._frames and not self._cond.wait_for(lambda: self._frames, timeout):
+                return None
+            # Hand out the newest frame; anything older is already stale
+            item = self._frames.pop()
+            self.dropped += len(self._frames)
+            self._frames.clear()
+            return item
+
+    def pending(self):
+        with self._cond:
+            return len(self._frames)
+
+    def clear(self):
+        with self._cond:
+            self._frames.clear()
+
+
+class FramePipeline:
+    """Capture thread feeding a pool of decode workers at a target rate"""
+
+    def __init__(self, scanner, capture, workers=2, target_rate=10.0, queue_size=2, scan_fn=None,
+                 scan_timeout=None, cancel_superseded=True):
+        self.scanner = scanner
+        # Optional (frame, captured_at, deadline) -> list of symbols function
+        # (e.g. BarcodeTracker.process); defaults to scanner.find_ean13
+        self.scan_fn = scan_fn
+        self.scan_timeout = scan_timeout  # seconds one frame's scan may take (None: no limit)
+        self.cancel_superseded = cancel_superseded  # abandon scans older than a finished one
+        self.capture = capture
+        self.workers = workers
+        self.target_rate = target_rate  # decode attempts per second across all workers
+        self.frames = FrameQueue(queue_size)
+        self.results = queue.Queue()
+        self.error = None
+        self._stop = threading.Event()
+        self._threads = []
+        self._latest = None
+        self._latest_lock = threading.Lock()
+        self._slot_lock = threading.Lock()
+        self._next_slot = 0.0
+        self._counters = {'captured': 0, 'scanned': 0, 'decoded': 0, 'timed_out': 0, 'cancelled': 0}
+        self._counter_lock = threading.Lock()
+        self._in_flight = {}  # frame id -> ScanDeadline of the scan decoding it
+        self._in_flight_lock = threading.Lock()
+
+    def start(self):
+        self._stop.clear()
+        self._threads = [threading.Thread(target=self._capture_loop, name='capture', daemon=True)]
+        for i in range(self.workers):
+            self._threads.append(threading.Thread(target=self._decode_loop, name=f'decode-{i}', daemon=True))
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        self._cancel_scans()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+        self.frames.clear()
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def latest_frame(self):
+        """Most recently captured frame (shared, do not modify), or None"""
+        with self._latest_lock:
+            return self._latest
+
+    def get_result(self, timeout=None):
+        """Next decode result, or None if nothing was decoded within timeout"""
+        try:
+            return self.results.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def get_stats(self):
+        with self._counter_lock:
+            stats = dict(self._counters)
+        stats['dropped'] = self.frames.dropped
+        return stats
+
+    def _count(self, name):
+        with self._counter_lock:
+            self._counters[name] += 1
+
+    def _capture_loop(self):
+        frame_id = 0
+        while not self._stop.is_set():
+            ret, frame = self.capture.read()
+            if not ret and getattr(self.capture, 'finished', False):
+                # A recorded video (VideoSource) ran out; let the workers drain the queue
+                logger.info("End of video source")
+                self._drain_and_stop()
+                break
+            if not ret:
+                self.error = "Could not read from webcam"
+                logger.error(self.error)
+                self._stop.set()
+                break
+            frame_id += 1
+            self._count('captured')
+            with self._latest_lock:
+                self._latest = frame
+            self.frames.put((frame_id, time.time(), frame))
+
+    def _drain_and_stop(self):
+        """Stop once the decode workers have taken every queued frame"""
+        while self.frames.pending() and not self._stop.is_set():
+            time.sleep(0.01)
+        self._stop.set()
+
+    def _cancel_scans(self, older_than=None):
+        """Cancel in-flight scans (only those of frames before older_than, if given)"""
+        with self._in_flight_lock:
+            for frame_id, deadline in self._in_flight.items():
+                if older_than is None or frame_id < older_than:
+                    deadline.cancel()
+
+    def _wait_for_slot(self):
+        """Reserve the next decode slot so all workers together keep to target_rate"""
+        if not self.target_rate:
+            return True
+        with self._slot_lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + 1.0 / self.target_rate
+        return not self._stop.wait(slot - now)
+
+    def _decode_loop(self):
+        while not self._stop.is_set():
+            if not self._wait_for_slot():
+                break
+            item = self.frames.get(timeout=0.5)
+            if item is None:
+                continue
+            frame_id, captured_at, frame = item
+
+            deadline = ScanDeadline(self.scan_timeout)
+            with self._in_flight_lock:
+                self._in_flight[frame_id] = deadline
+            if self._stop.is_set():
+                # stop() may have cancelled the in-flight scans just before this one registered
+                deadline.cancel()
+            try:
+                if self.scan_fn is not None:
+                    symbols = self.scan_fn(frame, captured_at, deadline)
+                else:
+                    symbol = self.scanner.find_ean13(frame, deadline)
+                    symbols = [symbol] if symbol else []
+            finally:
+                with self._in_flight_lock:
+                    del self._in_flight[frame_id]
+            self._count('scanned')
+            if deadline.reason == 'timeout':
+                self._count('timed_out')
+            elif deadline.reason == 'cancelled':
+                self._count('cancelled')
+            elif self.cancel_superseded and not deadline.partial:
+                # This frame's answer is in; scans of older frames could only be staler
+                self._cancel_scans(older_than=frame_id)
+
+            for symbol in symbols:
+                self._count('decoded')
+                result = dict(symbol)
+                result.update({
+                    'barcode': symbol['data'],
+                    'frame_id': frame_id,
+                    'captured_at': captured_at,
+                    'latency': time.time() - captured_at
+                })
+                self.results.put(result)
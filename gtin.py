@@ -0,0 +1,182 @@
+"""GTIN check-digit validation and normalization.
+
+Covers the GS1 numeric codes read from retail barcodes: EAN-8, UPC-A,
+EAN-13, GTIN-14 and UPC-E (expanded to UPC-A). Every valid code has one
+canonical key, its 14-digit GTIN, so the same product read as UPC-A,
+"0" + UPC-A or EAN-13 maps to the same cache entry.
+
+validate_many and gtin14_many check whole arrays of codes at once with
+NumPy, for batch exports with millions of rows:
+
+    python gtin.py codes.txt        # one code per line; prints the invalid ones
+"""
+import argparse
+import sys
+
+from lazy_imports import lazy_import
+
+np = lazy_import('numpy')
+
+GTIN_LENGTHS = (8, 12, 13, 14)
+
+# pyzbar symbologies whose data is a GS1 code with a check digit
+GTIN_SYMBOLOGIES = {'EAN8', 'EAN13', 'UPCA', 'UPCE', 'ISBN13', 'ISBN10'}
+
+
+def check_digit(body):
+    """GS1 check digit for a string of digits (the code without its last digit)"""
+    total = 0
+    for i, c in enumerate(reversed(body)):
+        total += int(c) * (3 if i % 2 == 0 else 1)
+    return (10 - total % 10) % 10
+
+
+def is_valid_gtin(code):
+    """True for an EAN-8, UPC-A, EAN-13 or GTIN-14 with a correct check digit"""
+    if not isinstance(code, str) or len(code) not in GTIN_LENGTHS or not (code.isascii() and code.isdigit()):
+        return False
+    return check_digit(code[:-1]) == int(code[-1])
+
+
+def expand_upce(code):
+    """Expand a UPC-E code to its 12-digit UPC-A form, or None if it is not valid UPC-E
+
+    Accepts the 6 compressed digits, 7 digits (number system first) or the
+    full 8 digits (number system, 6 digits, check digit).
+    """
+    if not isinstance(code, str) or not (code.isascii() and code.isdigit()) or len(code) not in (6, 7, 8):
+        return None
+    number_system = code[0] if len(code) > 6 else '0'
+    digits = code[1:7] if len(code) > 6 else code
+    if number_system not in '01':
+        return None
+
+    last = digits[5]
+    if last in '012':
+        body = digits[0:2] + last + '0000' + digits[2:5]
+    elif last == '3':
+        body = digits[0:3] + '00000' + digits[3:5]
+    elif last == '4':
+        body = digits[0:4] + '00000' + digits[4]
+    else:
+        body = digits[0:5] + '0000' + last
+    upca = number_system + body
+    upca += str(check_digit(upca))
+
+    if len(code) == 8 and upca[-1] != code[-1]:
+        return None
+    return upca
+
+
+def to_gtin14(code, symbology=None):
+    """Canonical 14-digit key for a valid code, or None
+
+    symbology 'UPCE' (or 'UPC_E') expands the code before validating it.
+    """
+    if not isinstance(code, str):
+        return None
+    code = code.strip()
+    if symbology in ('UPCE', 'UPC_E'):
+        code = expand_upce(code)
+        if code is None:
+            return None
+    if not is_valid_gtin(code):
+        return None
+    return code.zfill(14)
+
+
+def to_ean13(code):
+    """EAN-13 form of a valid code that fits in 13 digits (UPC-A gains a leading 0), or None"""
+    key = to_gtin14(code)
+    if key is None or key[0] != '0':
+        return None
+    return key[1:]
+
+
+def to_product_code(code, symbology=None):
+    """Shortest standard form of a valid code (GTIN-8, EAN-13 or GTIN-14), or None
+
+    This is the form product databases index codes by: an EAN-8 stays 8 digits,
+    UPC-A and UPC-E become EAN-13 and only case codes keep all 14 digits.
+    """
+    key = to_gtin14(code, symbology)
+    if key is None:
+        return None
+    if key.startswith('000000'):
+        return key[6:]
+    return key[1:] if key[0] == '0' else key
+
+
+def is_valid_symbol(symbol):
+    """Reject decoded GS1 symbols whose check digit does not match"""
+    symbology = symbol.get('type')
+    if symbology not in GTIN_SYMBOLOGIES or symbology == 'ISBN10':
+        return True
+    return to_gtin14(symbol['data'], symbology) is not None
+
+
+def validate_many(codes):
+    """Vectorized is_valid_gtin over a sequence of code strings; returns a bool array"""
+    codes = np.asarray(codes, dtype=str)
+    if codes.size == 0:
+        return np.zeros(codes.shape, bool)
+    flat = codes.reshape(-1)
+
+    # Unicode strings are stored as fixed-width UCS-4 padded with NULs; view them as code points
+    width = flat.dtype.itemsize // 4
+    points = flat.view(np.uint32).reshape(len(flat), width)
+    max_length = max(GTIN_LENGTHS)
+
+    # Walk the columns one at a time so memory stays a few bytes per code, whatever the batch size
+    lengths = np.zeros(len(flat), np.uint8)
+    all_digits = np.ones(len(flat), bool)
+    sums = [np.zeros(len(flat), np.uint16), np.zeros(len(flat), np.uint16)]  # digits at even, odd positions
+    for i in range(min(width, max_length)):
+        column = points[:, i]
+        present = column != 0
+        digits = column - ord('0')  # wraps around for code points below '0'
+        is_digit = digits <= 9
+        lengths += present
+        all_digits &= is_digit | ~present
+        sums[i % 2] += np.where(is_digit, digits, 0).astype(np.uint8)
+    if width > max_length:
+        all_digits &= points[:, max_length] == 0
+
+    # Weight 3 goes to every other digit counting left from the check digit, which
+    # is the positions with the same parity as the length; the weighted sum of a
+    # valid code, check digit included, is a multiple of 10
+    even_length = lengths % 2 == 0
+    total = np.where(even_length, 3 * sums[0] + sums[1], sums[0] + 3 * sums[1])
+
+    valid = np.isin(lengths, GTIN_LENGTHS) & all_digits & (total % 10 == 0)
+    return valid.reshape(codes.shape)
+
+
+def gtin14_many(codes):
+    """Vectorized to_gtin14; invalid codes become empty strings"""
+    codes = np.asarray(codes, dtype=str)
+    if codes.size == 0:
+        return codes.astype('U14')
+    # Surrounding whitespace is ignored, as in to_gtin14
+    codes = np.char.strip(codes)
+    valid = validate_many(codes)
+    return np.where(valid, np.char.zfill(codes, 14), '').astype('U14')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the GS1 check digits of a list of codes")
+    parser.add_argument('path', help="File with one code per line ('-' for stdin)")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.path == '-' else open(args.path)
+    with source:
+        codes = [line.strip() for line in source if line.strip()]
+    valid = validate_many(codes)
+    for code in np.asarray(codes, dtype=str)[~valid]:
+        print(code)
+    print(f"{int(valid.sum())} of {len(codes)} codes valid", file=sys.stderr)
+    return 0 if valid.all() else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
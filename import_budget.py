@@ -0,0 +1,82 @@
+"""Import-time budget check for the modules used by workers and CLI tools.
+
+Imports each module in a fresh interpreter, several times, and compares the
+median import time with its budget. It also checks that the heavy
+dependencies (OpenCV, NumPy, pyzbar, requests, Streamlit, Pillow) have not
+been loaded eagerly, since they should only load on first use. Exits non-zero
+when a module is over budget or loads a heavy dependency at import.
+
+    python import_budget.py
+    python import_budget.py scanner_core resolver --repeat 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# Median import time allowed per module, in milliseconds
+IMPORT_BUDGETS_MS = {
+    'scanner_core': 60,
+    'resolver': 60,
+    'scan_worker': 60,
+    'batch_scan': 100,
+    'video_scan': 100,
+    'async_lookup': 120,
+    'scan_service': 150,
+}
+
+HEAVY_MODULES = ['cv2', 'numpy', 'pyzbar.pyzbar', 'requests', 'streamlit', 'PIL.Image']
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+# Modules set up by lazy_import stay _LazyModule instances until first used
+loaded = [m for m in {heavy!r} if m in sys.modules and type(sys.modules[m]).__name__ != '_LazyModule']
+print(json.dumps({{'ms': 1000 * elapsed, 'loaded': loaded}}))
+"""
+
+
+def measure(module, repeat=5):
+    """Median import time (ms) of module over repeat fresh interpreters, and eagerly loaded heavy modules"""
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [here, os.environ.get('PYTHONPATH')])))
+    code = _PROBE.format(module=module, heavy=HEAVY_MODULES)
+    times = []
+    loaded = []
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=here, env=env, check=True).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result['ms'])
+        loaded = result['loaded']
+    return statistics.median(times), loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check module import times against their budgets")
+    parser.add_argument('modules', nargs='*', help="Modules to check (default: all budgeted modules)")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per module (default: 5)")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for module in args.modules or list(IMPORT_BUDGETS_MS):
+        budget = IMPORT_BUDGETS_MS.get(module)
+        elapsed, loaded = measure(module, args.repeat)
+        over = budget is not None and elapsed > budget
+        status = 'FAIL' if over or loaded else 'ok'
+        ok = ok and status == 'ok'
+        line = f"{status:4} {module:16} {elapsed:7.1f} ms"
+        if budget is not None:
+            line += f" (budget {budget} ms)"
+        if loaded:
+            line += f", loads {', '.join(loaded)} at import"
+        print(line)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
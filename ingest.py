@@ -0,0 +1,154 @@
+"""Decode uploaded and batch images straight to grayscale.
+
+Scanning only needs a single-channel image, so load_gray decodes JPEG and
+PNG data directly to grayscale instead of going through a colour array (or
+a PIL image copied into NumPy). The encoded data is read in place: bytes,
+memoryview, BytesIO-like uploads and file paths (memory-mapped) are all
+wrapped with np.frombuffer rather than copied. With min_side, images are
+decoded at 1/2, 1/4 or 1/8 size as long as the shorter side stays at least
+min_side pixels; for JPEGs the decoder itself skips the detail, which is
+much faster than decoding at full size and resizing.
+
+Transparent images (RGBA, grey + alpha, palette with a transparent colour)
+are composited onto white, since OpenCV's grayscale decoding would drop the
+alpha channel and leave transparent areas black.
+
+    gray = load_gray(uploaded_file, min_side=1000)
+    gray = load_gray('photos/IMG_0001.jpg')
+"""
+import mmap
+import os
+import struct
+
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+# Reduction factors the decoder supports, largest first
+REDUCED_GRAYSCALE = ((8, 'IMREAD_REDUCED_GRAYSCALE_8'), (4, 'IMREAD_REDUCED_GRAYSCALE_4'),
+                     (2, 'IMREAD_REDUCED_GRAYSCALE_2'))
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def load_gray(source, min_side=None):
+    """Decode an image to a single-channel uint8 array, or None if it cannot be decoded
+
+    source is encoded image data (bytes, bytearray, memoryview, mmap), a
+    file-like object such as a Streamlit upload, a file path, or an already
+    decoded BGR/BGRA/grayscale array. min_side allows reduced-size decoding
+    down to that shorter side.
+    """
+    if isinstance(source, np.ndarray) and source.ndim >= 2:
+        return to_gray(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return None
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                return decode_gray(mapped, min_side)
+    if hasattr(source, 'getbuffer'):
+        # BytesIO (and Streamlit's UploadedFile): a view of the upload, not a copy
+        with source.getbuffer() as view:
+            return decode_gray(view, min_side)
+    if hasattr(source, 'read'):
+        return decode_gray(source.read(), min_side)
+    return decode_gray(source, min_side)
+
+
+def decode_gray(data, min_side=None):
+    """Decode encoded image data from any buffer-protocol object to grayscale"""
+    view = memoryview(data).cast('B')
+    buffer = np.frombuffer(view, np.uint8)
+    if buffer.size == 0:
+        return None
+    header = view[:32].tobytes()
+
+    if header.startswith(b'\xff\xd8'):
+        return cv2.imdecode(buffer, _reduced_flag(_jpeg_size(view), min_side))
+    if header.startswith(PNG_SIGNATURE) and not _png_has_alpha(view):
+        return cv2.imdecode(buffer, _reduced_flag(_png_size(header), min_side))
+    # Transparent PNGs and other formats keep their alpha channel for compositing
+    image = cv2.imdecode(buffer, cv2.IMREAD_UNCHANGED)
+    return None if image is None else to_gray(image)
+
+
+def to_gray(image, channel_order='BGR'):
+    """Single-channel uint8 version of a decoded image, compositing transparency onto white"""
+    if image.dtype == np.uint16:
+        image = (image >> 8).astype(np.uint8)
+    if image.ndim == 2:
+        return image
+    channels = image.shape[2]
+    if channels == 1:
+        return image[:, :, 0]
+    if channels == 3:
+        code = cv2.COLOR_RGB2GRAY if channel_order == 'RGB' else cv2.COLOR_BGR2GRAY
+        return cv2.cvtColor(image, code)
+
+    if channels == 2:
+        gray, alpha = np.ascontiguousarray(image[:, :, 0]), image[:, :, 1]
+    else:
+        code = cv2.COLOR_RGBA2GRAY if channel_order == 'RGB' else cv2.COLOR_BGRA2GRAY
+        gray, alpha = cv2.cvtColor(image, code), image[:, :, 3]
+    # gray * a + 255 * (1 - a), computed in place as 255 - (255 - gray) * a
+    cv2.subtract(255, gray, dst=gray)
+    cv2.multiply(gray, np.ascontiguousarray(alpha), dst=gray, scale=1 / 255)
+    cv2.subtract(255, gray, dst=gray)
+    return gray
+
+
+def _reduced_flag(size, min_side):
+    """Largest reduced-grayscale imdecode flag keeping the shorter side at least min_side"""
+    if min_side and size is not None:
+        shorter = min(size)
+        for factor, name in REDUCED_GRAYSCALE:
+            if shorter // factor >= min_side:
+                return getattr(cv2, name)
+    return cv2.IMREAD_GRAYSCALE
+
+
+def _jpeg_size(view):
+    """(width, height) from a JPEG's start-of-frame marker, or None"""
+    offset = 2
+    while offset + 9 <= len(view):
+        if view[offset] != 0xFF:
+            return None
+        marker = view[offset + 1]
+        if marker == 0xFF:  # fill byte
+            offset += 1
+            continue
+        if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+            height, width = struct.unpack('>HH', view[offset + 5:offset + 9].tobytes())
+            return width, height
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:  # markers without a length
+            offset += 2
+            continue
+        offset += 2 + struct.unpack('>H', view[offset + 2:offset + 4].tobytes())[0]
+    return None
+
+
+def _png_size(header):
+    """(width, height) from a PNG's IHDR chunk"""
+    if len(header) < 24:
+        return None
+    return struct.unpack('>II', header[16:24])
+
+
+def _png_has_alpha(view):
+    """True for PNGs with an alpha channel or a tRNS (transparent colour) chunk"""
+    if len(view) < 26:
+        return False
+    if view[25] in (4, 6):  # IHDR colour type: grey + alpha, RGBA
+        return True
+    # Ancillary chunks, tRNS among them, all come before the image data
+    offset = 8
+    while offset + 8 <= len(view):
+        length, kind = struct.unpack('>I4s', view[offset:offset + 8].tobytes())
+        if kind == b'tRNS':
+            return True
+        if kind in (b'IDAT', b'IEND'):
+            return False
+        offset += 12 + length
+    return False
@@ -0,0 +1,59 @@
+"""Deferred imports for heavy optional dependencies.
+
+    cv2 = lazy_import('cv2')
+
+returns a module object immediately; the real import runs the first time an
+attribute is used. Processes that never decode an image (lookup-only
+workers, CLI tools) then never pay for OpenCV, NumPy, pyzbar or requests.
+"""
+import importlib.util
+import sys
+
+
+class _CleanupLoader:
+    """Wraps a module's loader so a failed import leaves nothing broken behind
+
+    A lazy module whose import fails (say pyzbar without the zbar library)
+    would otherwise stay in sys.modules as an empty module: the first access
+    raises ImportError and later ones a misleading AttributeError. Instead the
+    module is removed from sys.modules and made lazy again, so every access
+    raises the ImportError.
+    """
+
+    def __init__(self, loader, name):
+        self.loader = loader
+        self.name = name
+        self.lazy_class = None  # set once the module has been made lazy
+
+    def create_module(self, spec):
+        return self.loader.create_module(spec)
+
+    def exec_module(self, module):
+        sys.modules.setdefault(self.name, module)
+        try:
+            self.loader.exec_module(module)
+        except BaseException:
+            if sys.modules.get(self.name) is module:
+                del sys.modules[self.name]
+            state = module.__spec__.loader_state
+            module.__dict__.clear()
+            module.__dict__.update(state['__dict__'])
+            module.__class__ = self.lazy_class
+            raise
+
+
+def lazy_import(name):
+    """Return module name, imported on first attribute access"""
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named '{name}'", name=name)
+    cleanup = _CleanupLoader(spec.loader, name)
+    loader = importlib.util.LazyLoader(cleanup)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    cleanup.lazy_class = type(module)
+    return module
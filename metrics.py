@@ -0,0 +1,240 @@
+"""Lightweight counters and timers for the scan and lookup hot paths.
+
+The shared registry `metrics` is disabled by default. While disabled every
+call returns immediately, so instrumentation can stay in hot loops. Once
+enabled, values can be exported in Prometheus text format from a local HTTP
+endpoint (serve) or written to a file (dump).
+
+    from metrics import metrics
+    metrics.enable()
+    metrics.serve(9108)        # http://127.0.0.1:9108/metrics
+
+Setting BARCODE_METRICS_PORT or BARCODE_METRICS_FILE has the same effect
+for the Streamlit app through configure_from_env().
+"""
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _NullTimer:
+    """Timer handed out while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+        return False
+
+
+class Metrics:
+    """Registry of labelled counters and latency histograms"""
+
+    def __init__(self, enabled=False, buckets=DEFAULT_BUCKETS):
+        self.enabled = enabled
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._counters = {}  # (name, labels) -> value
+        self._histograms = {}  # (name, labels) -> [bucket counts..., count, sum]
+        self._server = None
+        self._dump_thread = None
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def inc(self, name, value=1, **labels):
+        """Add value to a counter"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        """Record a duration in a histogram"""
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += seconds
+
+    def timer(self, name, **labels):
+        """Context manager that observes the duration of its block"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name, labels)
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Current values as plain dicts, keyed by (name, labels)"""
+        with self._lock:
+            return dict(self._counters), {k: list(v) for k, v in self._histograms.items()}
+
+    def drain(self):
+        """Return the current values like snapshot and reset them, for shipping to another process"""
+        with self._lock:
+            counters, histograms = self._counters, self._histograms
+            self._counters, self._histograms = {}, {}
+            return counters, histograms
+
+    def merge(self, counters, histograms):
+        """Add values drained from another registry with the same buckets"""
+        with self._lock:
+            for key, value in counters.items():
+                self._counters[key] = self._counters.get(key, 0) + value
+            for key, values in histograms.items():
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = [0] * (len(self.buckets) + 2)
+                for i, value in enumerate(values):
+                    histogram[i] += value
+
+    def to_prometheus(self):
+        """Render all metrics in the Prometheus text exposition format"""
+        counters, histograms = self.snapshot()
+        lines = []
+
+        seen = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in seen:
+                lines.append(f"# TYPE {name} counter")
+                seen.add(name)
+            lines.append(f"{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), histogram in sorted(histograms.items()):
+            if name not in seen:
+                lines.append(f"# TYPE {name} histogram")
+                seen.add(name)
+            for bound, count in zip(self.buckets, histogram):
+                lines.append(f"{name}_bucket{_format_labels(labels + (('le', repr(bound)),))} {count}")
+            lines.append(f"{name}_bucket{_format_labels(labels + (('le', '+Inf'),))} {histogram[-2]}")
+            lines.append(f"{name}_count{_format_labels(labels)} {histogram[-2]}")
+            lines.append(f"{name}_sum{_format_labels(labels)} {histogram[-1]:.6f}")
+
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """Write the Prometheus text format to a file (atomically replaced)"""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(self.to_prometheus())
+        os.replace(tmp_path, path)
+
+    def dump_periodically(self, path, interval=15.0):
+        """Rewrite the metrics file every interval seconds from a background thread"""
+        if self._dump_thread is not None:
+            return
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.dump(path)
+                except Exception as e:
+                    # Keep dumping; the disk may recover or the directory be created later
+                    logger.warning(f"Could not write metrics to {path}: {str(e)}")
+
+        self._dump_thread = threading.Thread(target=loop, name='metrics-dump', daemon=True)
+        self._dump_thread.start()
+
+    def serve(self, port=9108, host='127.0.0.1'):
+        """Serve /metrics from a background thread; safe to call more than once"""
+        if self._server is not None:
+            return self._server
+        # Imported here: http.server is slow to import and most processes never serve
+        import http.server
+        registry = self
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = http.server.ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics', daemon=True).start()
+        return self._server
+
+    def stop_server(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    parts = []
+    for key, value in labels:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        parts.append(f'{key}="{value}"')
+    return '{' + ','.join(parts) + '}'
+
+
+# Shared registry used by the scanner and lookup code
+metrics = Metrics()
+
+
+def configure_from_env():
+    """Enable metrics from BARCODE_METRICS_PORT / BARCODE_METRICS_FILE if set"""
+    port = os.environ.get('BARCODE_METRICS_PORT')
+    path = os.environ.get('BARCODE_METRICS_FILE')
+    if port or path:
+        metrics.enable()
+    if port:
+        try:
+            metrics.serve(int(port))
+        except OSError:
+            # Another process (or an earlier Streamlit rerun) already serves this port
+            pass
+    if path:
+        metrics.dump_periodically(path)
+    return metrics
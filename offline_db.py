@@ -0,0 +1,169 @@
+"""Offline product database built from an Open Food Facts export.
+
+The importer streams the Open Food Facts CSV (tab-separated) or JSONL dump,
+optionally gzip-compressed, into a compact SQLite index holding only the
+fields get_product_info returns. Memory use stays constant however large
+the dump is. Lookups read the index through a memory map.
+
+    python offline_db.py en.openfoodfacts.org.products.csv.gz --db products_offline.db
+"""
+import argparse
+import csv
+import gzip
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_OFFLINE_DB_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'barcode_scanner',
+                                       'products_offline.db')
+PRODUCT_FIELDS = ['brands', 'product_name', 'categories', 'image_url']
+
+
+def normalize_code(code):
+    """Index key for a product code (12-digit UPC-A codes are stored in EAN-13 form)"""
+    code = code.strip()
+    if len(code) == 12 and code.isdigit():
+        return '0' + code
+    return code
+
+
+def _open_text(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', newline='')
+    return open(path, 'r', encoding='utf-8', newline='')
+
+
+def _iter_csv(path):
+    """Yield (code, brands, product_name, categories, image_url) from a CSV/TSV dump"""
+    csv.field_size_limit(2 ** 31 - 1)
+    with _open_text(path) as f:
+        # The official export is tab-separated despite its .csv extension
+        header = f.readline()
+        delimiter = '\t' if '\t' in header else ','
+        columns = next(csv.reader([header], delimiter=delimiter))
+        quoting = csv.QUOTE_NONE if delimiter == '\t' else csv.QUOTE_MINIMAL
+        reader = csv.DictReader(f, fieldnames=columns, delimiter=delimiter, quoting=quoting)
+        for row in reader:
+            yield (row.get('code'),) + tuple(row.get(field) for field in PRODUCT_FIELDS)
+
+
+def _iter_jsonl(path):
+    """Yield (code, brands, product_name, categories, image_url) from a JSONL dump"""
+    with _open_text(path) as f:
+        for line in f:
+            try:
+                product = json.loads(line)
+            except ValueError:
+                continue
+            image_url = product.get('image_url') or product.get('image_front_url')
+            yield (product.get('code'), product.get('brands'), product.get('product_name'),
+                   product.get('categories'), image_url)
+
+
+def import_dump(dump_path, db_path=DEFAULT_OFFLINE_DB_PATH, batch_size=10000):
+    """Stream an Open Food Facts dump into the offline index; returns rows imported"""
+    is_jsonl = dump_path.endswith(('.jsonl', '.jsonl.gz', '.json', '.json.gz'))
+    rows = _iter_jsonl(dump_path) if is_jsonl else _iter_csv(dump_path)
+
+    directory = os.path.dirname(db_path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    db = sqlite3.connect(db_path)
+    # The index is rebuilt from the dump if an import is interrupted, so skip durability
+    db.execute('PRAGMA journal_mode=OFF')
+    db.execute('PRAGMA synchronous=OFF')
+    db.execute(
+        'CREATE TABLE IF NOT EXISTS products ('
+        'code TEXT PRIMARY KEY, brands TEXT, product_name TEXT, categories TEXT, image_url TEXT'
+        ') WITHOUT ROWID'
+    )
+
+    imported = 0
+    start = time.time()
+    batch = []
+    try:
+        for code, *fields in rows:
+            if not code or not code.strip():
+                continue
+            batch.append((normalize_code(code),) + tuple(value or None for value in fields))
+            if len(batch) >= batch_size:
+                imported += _insert_batch(db, batch)
+                batch = []
+                if imported % (batch_size * 50) == 0:
+                    logger.info(f"Imported {imported} products ({imported / (time.time() - start):.0f}/s)")
+        imported += _insert_batch(db, batch)
+    finally:
+        db.close()
+
+    logger.info(f"Imported {imported} products into {db_path} in {time.time() - start:.1f}s")
+    return imported
+
+
+def _insert_batch(db, batch):
+    if not batch:
+        return 0
+    with db:
+        db.executemany(
+            'INSERT OR REPLACE INTO products (code, brands, product_name, categories, image_url) '
+            'VALUES (?, ?, ?, ?, ?)', batch
+        )
+    return len(batch)
+
+
+class OfflineProductDB:
+    """Read-only, memory-mapped access to an imported product index"""
+
+    def __init__(self, db_path=DEFAULT_OFFLINE_DB_PATH, mmap_size=1 << 30):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False)
+        self._db.execute(f'PRAGMA mmap_size={int(mmap_size)}')
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def open_default(cls):
+        """Open the default index, or return None if it has not been imported"""
+        if os.path.exists(DEFAULT_OFFLINE_DB_PATH):
+            return cls(DEFAULT_OFFLINE_DB_PATH)
+        return None
+
+    def lookup(self, code):
+        """Return the product fields for a code, or None if it is not in the index"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT brands, product_name, categories, image_url FROM products WHERE code = ?',
+                (normalize_code(code),)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+        # Leave out missing fields so callers fall back to their defaults
+        return {field: value for field, value in zip(PRODUCT_FIELDS, row) if value is not None}
+
+    def close(self):
+        self._db.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build the offline product index from an Open Food Facts dump")
+    parser.add_argument('dump', help="Open Food Facts CSV/TSV or JSONL export (optionally .gz)")
+    parser.add_argument('--db', default=DEFAULT_OFFLINE_DB_PATH, help="Index file to create or update")
+    parser.add_argument('--batch-size', type=int, default=10000, help="Rows per insert transaction")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    count = import_dump(args.dump, args.db, args.batch_size)
+    print(f"Imported {count} products into {args.db}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+"""Throttled, downscaled preview frames for the webcam view.
+
+PreviewRenderer turns the latest captured frame into a small JPEG at most
+fps times per second, drawing the outlines of the barcodes currently in view
+on top: the latest decode results, or a tracker's live tracks, refreshed
+as they come in. It works on its own downscaled copy and never touches the capture or
+decode threads, so a slow display cannot hold up decoding. Frames that are
+not due yet, or that have already been shown, are skipped without any work.
+"""
+import threading
+import time
+
+from lazy_imports import lazy_import
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+OVERLAY_COLOR = (0, 200, 0)  # BGR
+
+
+class PreviewRenderer:
+    """Rate-limited preview encoder with a decoded-barcode overlay"""
+
+    def __init__(self, fps=10.0, width=480, jpeg_quality=70, overlay_seconds=1.0):
+        self.fps = fps  # maximum previews per second (0 disables the preview)
+        self.width = width  # preview width in pixels; frames are never upscaled
+        self.jpeg_quality = jpeg_quality  # 0-100
+        self.overlay_seconds = overlay_seconds  # how long an outline stays drawn after its last refresh
+        self._lock = threading.Lock()
+        self._overlays = {}  # label -> (expires_at, polygon) in source frame coordinates
+        self._last_frame = None
+        self._next_due = 0.0
+        self._counters = {'rendered': 0, 'skipped': 0}
+
+    def add_symbols(self, symbols, now=None):
+        """Draw symbols (with a 'polygon' or 'rect') on upcoming previews
+
+        Adding a symbol again moves its outline and keeps it drawn for another
+        overlay_seconds, so callers can pass what is in view on every frame.
+        """
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for symbol in symbols:
+                polygon = symbol.get('polygon')
+                if not polygon and symbol.get('rect'):
+                    x, y, w, h = symbol['rect']
+                    polygon = [(x, y), (x + w, y), (x + w, y + h), (x, y + h)]
+                if polygon:
+                    self._overlays[symbol['data']] = (now + self.overlay_seconds, polygon)
+
+    def time_until_due(self, now=None):
+        """Seconds until the next preview may be rendered"""
+        now = time.monotonic() if now is None else now
+        return max(0.0, self._next_due - now)
+
+    def render(self, frame, now=None, force=False):
+        """JPEG bytes of a preview for frame, or None if it is skipped
+
+        A frame is skipped when the preview is disabled, when the next preview
+        is not due yet, or when it is the frame that was rendered last time;
+        force renders it anyway (e.g. the final frame of a scan).
+        """
+        now = time.monotonic() if now is None else now
+        if frame is None or not self.fps or (not force and (now < self._next_due or frame is self._last_frame)):
+            self._counters['skipped'] += 1
+            return None
+        self._last_frame = frame
+        self._next_due = now + 1.0 / self.fps
+
+        scale = min(1.0, self.width / frame.shape[1])
+        if scale < 1.0:
+            preview = cv2.resize(frame, (self.width, int(frame.shape[0] * scale)), interpolation=cv2.INTER_AREA)
+        else:
+            preview = frame.copy()
+        self._draw_overlays(preview, scale, now)
+
+        ok, jpeg = cv2.imencode('.jpg', preview, [cv2.IMWRITE_JPEG_QUALITY, int(self.jpeg_quality)])
+        if not ok:
+            return None
+        self._counters['rendered'] += 1
+        return jpeg.tobytes()
+
+    def get_stats(self):
+        return dict(self._counters)
+
+    def _draw_overlays(self, preview, scale, now):
+        with self._lock:
+            self._overlays = {label: o for label, o in self._overlays.items() if o[0] > now}
+            overlays = [(label, polygon) for label, (_, polygon) in self._overlays.items()]
+        for label, polygon in overlays:
+            points = np.array([(int(x * scale), int(y * scale)) for x, y in polygon], np.int32)
+            cv2.polylines(preview, [points], True, OVERLAY_COLOR, 2)
+            x, y = points.min(axis=0)
+            cv2.putText(preview, label, (int(x), max(12, int(y) - 6)), cv2.FONT_HERSHEY_SIMPLEX,
+                        0.5, OVERLAY_COLOR, 1, cv2.LINE_AA)
@@ -0,0 +1,149 @@
+"""Two-tier cache for product lookups.
+
+An in-process LRU sits in front of an optional SQLite store so cached
+products survive restarts. Entries expire after a TTL; "not found" answers
+are cached too, with a shorter TTL.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from gtin import to_gtin14
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'barcode_scanner', 'products.db')
+# Barcode types whose cache keys are canonical GTINs
+GTIN_TYPES = {'EAN13', 'UPC_A', 'EAN8', 'UPC_E', 'GTIN14'}
+
+
+def normalize_barcode(barcode, barcode_type=None):
+    """Return the cache key for a barcode
+
+    EAN/UPC codes are keyed by their canonical 14-digit GTIN, so a UPC-A read,
+    its UPC-E form and the EAN-13 ("0" + UPC-A) read of one product share an entry.
+    """
+    barcode = barcode.strip()
+    if barcode_type in GTIN_TYPES:
+        return to_gtin14(barcode, barcode_type) or barcode
+    return barcode
+
+
+class ProductCache:
+    """LRU + SQLite cache of product lookup results with TTL and negative caching"""
+
+    def __init__(self, db_path=None, max_entries=4096, ttl=7 * 24 * 3600, negative_ttl=3600):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.ttl = ttl  # seconds a found product stays valid
+        self.negative_ttl = negative_ttl  # seconds a "not found" answer stays valid
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (expires_at, serialized result)
+        self._counters = {'memory_hits': 0, 'disk_hits': 0, 'misses': 0,
+                          'evictions': 0, 'expirations': 0, 'stores': 0}
+        self._db = None
+        if db_path:
+            self._open_db(db_path)
+
+    def _open_db(self, db_path):
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS products ('
+            'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)'
+        )
+
+    def get(self, key):
+        """Return the cached result for key, or None on a miss or expired entry"""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._counters['memory_hits'] += 1
+                    return json.loads(entry[1])
+                del self._memory[key]
+                self._counters['expirations'] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    'SELECT value, expires_at FROM products WHERE key = ?', (key,)
+                ).fetchone()
+                if row is not None:
+                    value, expires_at = row
+                    if expires_at > now:
+                        self._remember(key, expires_at, value)
+                        self._counters['disk_hits'] += 1
+                        return json.loads(value)
+                    self._db.execute('DELETE FROM products WHERE key = ?', (key,))
+                    self._counters['expirations'] += 1
+
+            self._counters['misses'] += 1
+            return None
+
+    def set(self, key, result, negative=False):
+        """Store a lookup result; negative entries use the shorter TTL"""
+        expires_at = time.time() + (self.negative_ttl if negative else self.ttl)
+        value = json.dumps(result)
+        with self._lock:
+            self._remember(key, expires_at, value)
+            self._counters['stores'] += 1
+            if self._db is not None:
+                self._db.execute(
+                    'INSERT OR REPLACE INTO products (key, value, expires_at) VALUES (?, ?, ?)',
+                    (key, value, expires_at)
+                )
+
+    def _remember(self, key, expires_at, value):
+        """Insert into the in-memory LRU, evicting the least recently used entries"""
+        self._memory[key] = (expires_at, value)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def purge_expired(self):
+        """Drop expired entries from both tiers and return how many were removed"""
+        now = time.time()
+        with self._lock:
+            expired = [k for k, (expires_at, _) in self._memory.items() if expires_at <= now]
+            for key in expired:
+                del self._memory[key]
+            removed = len(expired)
+            if self._db is not None:
+                removed += self._db.execute('DELETE FROM products WHERE expires_at <= ?', (now,)).rowcount
+            self._counters['expirations'] += removed
+            return removed
+
+    def clear(self):
+        """Remove every cached entry"""
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute('DELETE FROM products')
+
+    def get_stats(self):
+        """Hit/miss/eviction counters and current sizes"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['hits'] = stats['memory_hits'] + stats['disk_hits']
+            lookups = stats['hits'] + stats['misses']
+            stats['hit_rate'] = stats['hits'] / lookups if lookups else 0.0
+            stats['memory_entries'] = len(self._memory)
+            if self._db is not None:
+                stats['disk_entries'] = self._db.execute('SELECT COUNT(*) FROM products').fetchone()[0]
+            return stats
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
@@ -0,0 +1,183 @@
+"""Host-wide token-bucket rate limiting for upstream product APIs.
+
+Every Streamlit session, worker and service process on a machine shares one
+SQLite file holding a token bucket per upstream host, so together they stay
+within each API's quota instead of each process spending it separately. A
+429 from any process pauses that host for all of them until its Retry-After
+has passed. Bucket updates run in BEGIN IMMEDIATE transactions, which
+serializes them across processes without a separate daemon.
+
+    limiter = SharedRateLimiter()
+    if limiter.acquire('world.openfoodfacts.org', max_wait=10):
+        ...  # make the request
+
+Lookup results are shared the same way through the SQLite tier of
+ProductCache (DEFAULT_CACHE_PATH).
+
+    python rate_limiter.py          # show the current state of every bucket
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LIMITS_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'barcode_scanner', 'rate_limits.db')
+
+# host -> (tokens per second, bucket size); hosts not listed are only paused after a 429
+DEFAULT_RATES = {
+    'world.openfoodfacts.org': (100 / 60, 10),  # 100 product reads per minute
+    'api.upcitemdb.com': (6 / 60, 6),  # trial plan: 6 requests per minute burst
+}
+
+
+class SharedRateLimiter:
+    """Token buckets per host, shared by every process using the same file"""
+
+    def __init__(self, db_path=DEFAULT_LIMITS_PATH, rates=None, busy_timeout=10.0):
+        self.db_path = db_path
+        self.rates = dict(DEFAULT_RATES if rates is None else rates)
+        self._lock = threading.Lock()
+        self._counters = {'acquired': 0, 'waited': 0, 'wait_seconds': 0.0, 'refused': 0, 'blocks': 0}
+        directory = os.path.dirname(db_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # isolation_level=None: transactions are managed explicitly with BEGIN IMMEDIATE
+        self._db = sqlite3.connect(db_path, timeout=busy_timeout, check_same_thread=False,
+                                   isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(
+            'CREATE TABLE IF NOT EXISTS buckets ('
+            'host TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL, '
+            'blocked_until REAL NOT NULL DEFAULT 0)'
+        )
+
+    def acquire(self, host, max_wait=None, cancel_event=None):
+        """Take one token for host, waiting for it if needed
+
+        Returns False without taking a token when the wait would exceed
+        max_wait seconds or cancel_event is set while waiting.
+        """
+        start = time.monotonic()
+        while True:
+            delay = self._take(host)
+            if delay <= 0:
+                waited = time.monotonic() - start
+                with self._lock:
+                    self._counters['acquired'] += 1
+                    if waited > 0.001:
+                        self._counters['waited'] += 1
+                        self._counters['wait_seconds'] += waited
+                metrics.observe('lookup_rate_limit_wait_seconds', waited, host=host)
+                return True
+
+            waited = time.monotonic() - start
+            if max_wait is not None and waited + delay > max_wait:
+                logger.warning(f"Rate limit for {host}: no token within {max_wait:g}s")
+                with self._lock:
+                    self._counters['refused'] += 1
+                metrics.inc('lookup_rate_limit_refused_total', host=host)
+                return False
+            if cancel_event is None:
+                time.sleep(delay)
+            elif cancel_event.wait(delay):
+                return False
+
+    def block(self, host, seconds):
+        """Pause host for every process, e.g. after a 429 with Retry-After"""
+        until = time.time() + seconds
+        with self._lock:
+            self._counters['blocks'] += 1
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                self._db.execute(
+                    # The bucket restarts empty when the pause ends
+                    'INSERT INTO buckets (host, tokens, updated_at, blocked_until) VALUES (?, 0, ?, ?) '
+                    'ON CONFLICT(host) DO UPDATE SET tokens = 0, '
+                    'updated_at = MAX(blocked_until, excluded.blocked_until), '
+                    'blocked_until = MAX(blocked_until, excluded.blocked_until)',
+                    (host, until, until)
+                )
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def _take(self, host):
+        """Try to take a token; returns 0 on success, else seconds until one may be available"""
+        rate, burst = self.rates.get(host, (None, None))
+        with self._lock:
+            self._db.execute('BEGIN IMMEDIATE')
+            try:
+                now = time.time()
+                row = self._db.execute(
+                    'SELECT tokens, updated_at, blocked_until FROM buckets WHERE host = ?', (host,)
+                ).fetchone()
+                tokens, updated_at, blocked_until = row if row is not None else (burst or 0, now, 0.0)
+
+                if blocked_until > now:
+                    delay = blocked_until - now
+                elif rate is None:
+                    delay = 0.0  # unlimited host
+                else:
+                    tokens = min(burst, tokens + (now - updated_at) * rate)
+                    if tokens >= 1:
+                        tokens -= 1
+                        delay = 0.0
+                    else:
+                        delay = (1 - tokens) / rate
+                    self._db.execute(
+                        'INSERT OR REPLACE INTO buckets (host, tokens, updated_at, blocked_until) '
+                        'VALUES (?, ?, ?, ?)', (host, tokens, now, blocked_until)
+                    )
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+        return delay
+
+    def get_state(self):
+        """Current tokens and pause of every host seen so far, host -> dict"""
+        now = time.time()
+        with self._lock:
+            rows = self._db.execute('SELECT host, tokens, updated_at, blocked_until FROM buckets').fetchall()
+        state = {}
+        for host, tokens, updated_at, blocked_until in rows:
+            rate, burst = self.rates.get(host, (None, None))
+            if rate is not None:
+                tokens = min(burst, tokens + (now - updated_at) * rate)
+            state[host] = {'tokens': round(tokens, 2), 'blocked_for': round(max(0.0, blocked_until - now), 1)}
+        return state
+
+    def get_stats(self):
+        with self._lock:
+            return dict(self._counters)
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Show the shared per-host rate limit buckets")
+    parser.add_argument('--db', default=DEFAULT_LIMITS_PATH, help="Rate limit state file")
+    args = parser.parse_args(argv)
+
+    limiter = SharedRateLimiter(args.db)
+    for host, state in sorted(limiter.get_state().items()):
+        rate, burst = limiter.rates.get(host, (None, None))
+        limit = f"{rate * 60:.0f}/min, burst {burst}" if rate is not None else "unlimited"
+        print(f"{host:28} {state['tokens']:6.2f} tokens ({limit}), paused {state['blocked_for']}s")
+    limiter.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,98 @@
+"""Request coalescing in front of BarcodeScanner.get_product_info.
+
+When several threads (webcam sessions, batch workers) ask for the same
+barcode at the same time, only the first one performs the lookup; the others
+wait for its result instead of hitting the API themselves (single-flight).
+
+    resolver = BarcodeResolver(scanner)
+    products = resolver.resolve_many(['4006381333931', '4006381333931', '012345678905'])
+"""
+import copy
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from scanner_core import BarcodeScanner
+from product_cache import normalize_barcode, GTIN_TYPES
+
+logger = logging.getLogger(__name__)
+
+
+class BarcodeResolver:
+    """Single-flight product lookups with bulk, deduplicated resolution"""
+
+    def __init__(self, scanner=None, max_workers=8):
+        self.scanner = scanner or BarcodeScanner()
+        self.max_workers = max_workers  # parallel lookups in resolve_many
+        self._lock = threading.Lock()
+        self._in_flight = {}  # lookup key -> Future of the running lookup
+        self._counters = {'lookups': 0, 'coalesced': 0}
+
+    def resolve(self, barcode, barcode_type=None):
+        """Look up a barcode, joining an identical lookup if one is already running"""
+        if not barcode or not isinstance(barcode, str):
+            return self.scanner.get_product_info(barcode, barcode_type)
+
+        key = self._lookup_key(barcode, barcode_type)
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = Future()
+                self._in_flight[key] = future
+                self._counters['lookups'] += 1
+            else:
+                self._counters['coalesced'] += 1
+
+        if not leader:
+            logger.debug(f"Joining in-flight lookup for {barcode}")
+            # Each caller gets its own copy of the shared result
+            return copy.deepcopy(future.result())
+
+        try:
+            result = self.scanner.get_product_info(barcode, barcode_type)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+    def resolve_many(self, barcodes, barcode_type=None):
+        """Resolve a list of barcodes; duplicates are looked up once
+
+        Returns a dict mapping each distinct barcode to its product info.
+        """
+        # One lookup per product: UPC-A and EAN-13 forms of a GTIN share a key
+        groups = {}
+        for barcode in dict.fromkeys(barcodes):
+            valid = barcode and isinstance(barcode, str)
+            key = self._lookup_key(barcode, barcode_type) if valid else ('invalid', barcode)
+            groups.setdefault(key, []).append(barcode)
+        if len(groups) < len(barcodes):
+            logger.info(f"Resolving {len(groups)} distinct barcodes out of {len(barcodes)}")
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            results = executor.map(lambda group: self.resolve(group[0], barcode_type), groups.values())
+            resolved = {}
+            for group, result in zip(groups.values(), results):
+                resolved[group[0]] = result
+                for barcode in group[1:]:
+                    resolved[barcode] = copy.deepcopy(result)
+            return resolved
+
+    def _lookup_key(self, barcode, barcode_type):
+        """Single-flight key: the canonical GTIN-14 for EAN/UPC lookups, typed or not"""
+        lookup_type = barcode_type or self.scanner._determine_barcode_type(barcode)
+        if lookup_type in GTIN_TYPES:
+            return ('GTIN', normalize_barcode(barcode, lookup_type))
+        return (normalize_barcode(barcode, barcode_type), barcode_type)
+
+    def get_stats(self):
+        """Number of lookups performed and requests that joined one in flight"""
+        with self._lock:
+            stats = dict(self._counters)
+            stats['in_flight'] = len(self._in_flight)
+            return stats
@@ -0,0 +1,506 @@
+"""Headless HTTP scanning service.
+
+Wraps scan_barcode/scan_all and get_product_info behind a small JSON HTTP
+API for clients that cannot use the Streamlit app. Concurrent requests are
+grouped into micro-batches: image decodes go to a pool of worker processes
+(one BarcodeScanner each), product lookups to a thread pool behind the
+single-flight resolver. Queues are bounded; when they are full the service
+answers 503 with Retry-After instead of queueing without limit.
+
+    python scan_service.py --port 8080 --workers 4
+
+    POST /scan?lookup=1&all=1     raw image bytes -> decoded barcode(s) [+ product info]
+         &timeout=0.2             decode time budget in seconds, counted from arrival;
+                                  the result then has a 'status' (found, not_found, timeout)
+    GET  /lookup/<barcode>?type=  product info for one barcode
+    POST /lookup                  {"barcodes": [...], "type": null} -> {"results": {...}}
+    GET  /healthz                 liveness
+    GET  /readyz                  readiness (workers started, queues not saturated)
+    GET  /stats                   batching and queue statistics
+    GET  /metrics                 Prometheus metrics (see metrics.py), decode workers' included
+"""
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from concurrent.futures import (CancelledError, Future, ProcessPoolExecutor, ThreadPoolExecutor,
+                                TimeoutError as FutureTimeout)
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from scanner_core import BarcodeScanner, lookup_type
+from metrics import metrics
+from offline_db import OfflineProductDB
+from product_cache import ProductCache, DEFAULT_CACHE_PATH
+from rate_limiter import SharedRateLimiter
+from resolver import BarcodeResolver
+from ingest import load_gray
+from scan_worker import init_worker, worker_scanner
+
+logger = logging.getLogger(__name__)
+
+MAX_UPLOAD_BYTES = 20 * 1024 * 1024
+
+class Overloaded(Exception):
+    """Raised when a request cannot be queued because the service is saturated"""
+
+
+class ServiceStopped(Exception):
+    """Raised for requests submitted to, or still queued in, a stopped batcher"""
+
+
+def _decode_batch(items):
+    """Decode a micro-batch of (image bytes, scan_all, deadline) items inside a worker process
+
+    Returns the results and the metrics the worker recorded since its last
+    batch, for the parent to merge into the registry it exports.
+    """
+    results = [_decode_one(data, scan_all, deadline_at) for data, scan_all, deadline_at in items]
+    return results, metrics.drain()
+
+
+def _decode_one(data, scan_all, deadline_at=None):
+    start = time.perf_counter()
+    try:
+        image = load_gray(data)
+        if image is None:
+            result = {'error': 'Could not decode image'}
+        elif deadline_at is not None:
+            # The budget started when the request arrived, so queueing time counts against it
+            outcome = worker_scanner().scan(image, timeout=max(0.0, deadline_at - time.time()), find_all=scan_all)
+            if scan_all:
+                result = {'symbols': outcome['symbols']}
+            else:
+                result = {'barcode': outcome['symbols'][0]['data'] if outcome['symbols'] else None}
+            result['status'] = outcome['status']
+        elif scan_all:
+            result = {'symbols': worker_scanner().scan_all(image)}
+        else:
+            result = {'barcode': worker_scanner().scan_barcode(image)}
+    except ImportError:
+        raise
+    except Exception as e:
+        result = {'error': str(e)}
+    result['elapsed_ms'] = round(1000 * (time.perf_counter() - start), 2)
+    return result
+
+
+class MicroBatcher:
+    """Groups submitted items into batches for a batch function
+
+    Items wait at most max_wait seconds for a batch to fill up to
+    max_batch_size. At most max_in_flight batches run at once; further items
+    queue up to max_pending, after which submit raises Overloaded. Items
+    still queued when the batcher stops fail with ServiceStopped.
+    """
+
+    def __init__(self, name, run_batch, max_batch_size=16, max_wait=0.005, max_pending=256, max_in_flight=4):
+        self.name = name
+        self.run_batch = run_batch  # list of items -> Future of a list of results
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_pending = max_pending
+        self._queue = queue.Queue(max_pending)
+        self._slots = threading.BoundedSemaphore(max_in_flight)
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self._counters = {'items': 0, 'batches': 0, 'rejected': 0, 'failed_batches': 0}
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._dispatch_loop, name=f'{self.name}-batcher', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=2.0):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        # Fail what never made it into a batch instead of leaving callers waiting
+        with self._lock:
+            while True:
+                try:
+                    _, future = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                future.set_exception(ServiceStopped(f"{self.name} stopped"))
+
+    def submit(self, item):
+        """Queue an item and return a Future of its result"""
+        future = Future()
+        with self._lock:
+            if self._stop.is_set():
+                raise ServiceStopped(f"{self.name} stopped")
+            try:
+                self._queue.put_nowait((item, future))
+            except queue.Full:
+                self._counters['rejected'] += 1
+                raise Overloaded(f"{self.name} queue is full")
+        return future
+
+    @property
+    def pending(self):
+        return self._queue.qsize()
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+        stats['pending'] = self.pending
+        stats['avg_batch_size'] = round(stats['items'] / stats['batches'], 2) if stats['batches'] else 0.0
+        return stats
+
+    def _count(self, name, value=1):
+        with self._lock:
+            self._counters[name] += value
+
+    def _next_batch(self):
+        """Wait for a first item, then collect more until the batch is full or max_wait passes"""
+        try:
+            batch = [self._queue.get(timeout=0.1)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _dispatch_loop(self):
+        while not self._stop.is_set():
+            # Waiting for a free slot here is what lets the queue fill up under load
+            if not self._slots.acquire(timeout=0.1):
+                continue
+            batch = self._next_batch()
+            if not batch:
+                self._slots.release()
+                continue
+
+            self._count('batches')
+            self._count('items', len(batch))
+            metrics.inc('service_batches_total', batcher=self.name)
+            metrics.inc('service_batch_items_total', len(batch), batcher=self.name)
+            try:
+                future = self.run_batch([item for item, _ in batch])
+            except Exception as e:
+                future = Future()
+                future.set_exception(e)
+            future.add_done_callback(lambda f, batch=batch: self._finish(batch, f))
+
+    def _finish(self, batch, future):
+        self._slots.release()
+        try:
+            results = future.result()
+        except CancelledError:
+            # The worker pool shut down before running the batch
+            for _, item_future in batch:
+                item_future.set_exception(ServiceStopped(f"{self.name} stopped"))
+            return
+        except Exception as e:
+            self._count('failed_batches')
+            logger.error(f"{self.name} batch of {len(batch)} failed: {str(e)}")
+            for _, item_future in batch:
+                item_future.set_exception(e)
+            return
+        for (_, item_future), result in zip(batch, results):
+            item_future.set_result(result)
+
+
+class ScanService:
+    """Decode and lookup micro-batching behind the HTTP handler"""
+
+    def __init__(self, scanner=None, workers=None, max_batch_size=16, max_wait=0.005,
+                 max_pending=256, lookup_workers=16, request_timeout=30.0):
+        # Scanner used for lookups in this process; decoding happens in the workers
+        self.scanner = scanner or BarcodeScanner(product_cache=ProductCache(db_path=DEFAULT_CACHE_PATH),
+                                                 offline_db=OfflineProductDB.open_default(),
+                                                 rate_limiter=SharedRateLimiter())
+        self.resolver = BarcodeResolver(self.scanner, max_workers=lookup_workers)
+        self.workers = workers or os.cpu_count() or 1
+        self.lookup_workers = lookup_workers
+        self.request_timeout = request_timeout  # seconds a request may wait for its result
+        self._decode_pool = None
+        self._lookup_pool = None
+        self._ready = threading.Event()
+        self.decoder = MicroBatcher('decode', self._run_decode_batch, max_batch_size, max_wait,
+                                    max_pending, max_in_flight=self.workers * 2)
+        self.lookups = MicroBatcher('lookup', self._run_lookup_batch, max_batch_size, max_wait,
+                                    max_pending, max_in_flight=max(1, lookup_workers // max_batch_size) + 1)
+
+    def start(self):
+        """Start the worker pools and batchers; readiness is reported once workers are up"""
+        self._decode_pool = ProcessPoolExecutor(max_workers=self.workers, initializer=init_worker,
+                                                initargs=(metrics.enabled,))
+        self._lookup_pool = ThreadPoolExecutor(max_workers=self.lookup_workers, thread_name_prefix='lookup')
+        self.decoder.start()
+        self.lookups.start()
+
+        # Warm up every worker process before reporting ready
+        warmups = [self._decode_pool.submit(_decode_batch, []) for _ in range(self.workers)]
+
+        def mark_ready():
+            for future in warmups:
+                metrics.merge(*future.result()[1])
+            self._ready.set()
+            logger.info(f"Scan service ready with {self.workers} decode workers")
+
+        threading.Thread(target=mark_ready, name='warmup', daemon=True).start()
+        return self
+
+    def stop(self):
+        self._ready.clear()
+        self.decoder.stop()
+        self.lookups.stop()
+        if self._decode_pool is not None:
+            self._decode_pool.shutdown(wait=True, cancel_futures=True)
+        if self._lookup_pool is not None:
+            self._lookup_pool.shutdown(wait=False, cancel_futures=True)
+
+    def scan(self, data, scan_all=False, lookup=False, timeout=None):
+        """Decode one image (bytes); optionally attach product info to what was found
+
+        timeout is a decode budget in seconds, counted from now.
+        """
+        deadline_at = None if timeout is None else time.time() + timeout
+        result = self.decoder.submit((bytes(data), scan_all, deadline_at)).result(self.request_timeout)
+        if lookup and 'error' not in result:
+            if scan_all:
+                symbols = result['symbols']
+                infos = self.lookup([(s['data'], lookup_type(s['type'])) for s in symbols])
+                for symbol, product_info in zip(symbols, infos):
+                    symbol['product_info'] = product_info
+            elif result['barcode']:
+                result['product_info'] = self.lookup([(result['barcode'], None)])[0]
+        return result
+
+    def lookup(self, items):
+        """Product info for (barcode, barcode_type) pairs, in order"""
+        futures = [self.lookups.submit(item) for item in items]
+        deadline = time.monotonic() + self.request_timeout
+        return [f.result(max(0.0, deadline - time.monotonic())) for f in futures]
+
+    def is_ready(self):
+        """Workers are up and neither queue is close to full"""
+        return (self._ready.is_set()
+                and self.decoder.pending < self.decoder.max_pending * 0.9
+                and self.lookups.pending < self.lookups.max_pending * 0.9)
+
+    def get_stats(self):
+        return {
+            'ready': self.is_ready(),
+            'workers': self.workers,
+            'decode': self.decoder.get_stats(),
+            'lookup': self.lookups.get_stats(),
+            'resolver': self.resolver.get_stats()
+        }
+
+    def _run_decode_batch(self, items):
+        """Decode a batch in a worker process and merge the metrics it sends back"""
+        batch_future = Future()
+
+        def unpack(future):
+            try:
+                results, (counters, histograms) = future.result()
+            except CancelledError:
+                batch_future.cancel()
+                return
+            except Exception as e:
+                batch_future.set_exception(e)
+                return
+            metrics.merge(counters, histograms)
+            batch_future.set_result(results)
+
+        self._decode_pool.submit(_decode_batch, items).add_done_callback(unpack)
+        return batch_future
+
+    def _run_lookup_batch(self, items):
+        """Resolve a batch of lookups concurrently; duplicates in the batch are resolved once"""
+        unique = list(dict.fromkeys(items))
+        batch_future = Future()
+        remaining = [len(unique)]
+        lock = threading.Lock()
+        futures = [self._lookup_pool.submit(self.resolver.resolve, barcode, barcode_type)
+                   for barcode, barcode_type in unique]
+
+        def collect(_):
+            # Completions can race on several pool threads; only the last one finishes the batch
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            try:
+                results = dict(zip(unique, [f.result() for f in futures]))
+                batch_future.set_result([results[item] for item in items])
+            except CancelledError:
+                batch_future.cancel()
+            except Exception as e:
+                batch_future.set_exception(e)
+
+        for future in futures:
+            future.add_done_callback(collect)
+        return batch_future
+
+
+class ScanRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive for clients sending many scans
+
+    @property
+    def service(self):
+        return self.server.service
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/healthz':
+            self._send_json(200, {'status': 'ok'})
+        elif url.path == '/readyz':
+            ready = self.service.is_ready()
+            self._send_json(200 if ready else 503, {'ready': ready})
+        elif url.path == '/stats':
+            self._send_json(200, self.service.get_stats())
+        elif url.path == '/metrics':
+            self._send(200, metrics.to_prometheus().encode('utf-8'), 'text/plain; version=0.0.4')
+        elif url.path.startswith('/lookup/'):
+            barcode = unquote(url.path[len('/lookup/'):])
+            barcode_type = parse_qs(url.query).get('type', [None])[0]
+            self._handle(lambda: self.service.lookup([(barcode, barcode_type)])[0])
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        try:
+            length = int(self.headers.get('Content-Length') or 0)
+            if length < 0:
+                raise ValueError(length)
+        except ValueError:
+            # Without a usable length the rest of the stream cannot be framed; drop the connection
+            self._send_json(400, {'error': 'Invalid Content-Length'})
+            self.close_connection = True
+            return
+        if length > MAX_UPLOAD_BYTES:
+            self._send_json(413, {'error': f'Request body larger than {MAX_UPLOAD_BYTES} bytes'})
+            self.close_connection = True
+            return
+        body = self.rfile.read(length)
+        params = parse_qs(url.query)
+
+        if url.path == '/scan':
+            if not body:
+                self._send_json(400, {'error': 'Empty image'})
+                return
+            scan_all = params.get('all', ['0'])[0] == '1'
+            lookup = params.get('lookup', ['0'])[0] == '1'
+            try:
+                timeout = float(params['timeout'][0]) if 'timeout' in params else None
+            except ValueError:
+                self._send_json(400, {'error': 'timeout must be a number of seconds'})
+                return
+            self._handle(lambda: self.service.scan(body, scan_all, lookup, timeout), error_status=422)
+        elif url.path == '/lookup':
+            try:
+                payload = json.loads(body or b'{}')
+                barcodes = payload['barcodes']
+                barcode_type = payload.get('type')
+                if not isinstance(barcodes, list) or not all(isinstance(b, str) for b in barcodes):
+                    raise TypeError('barcodes must be a list of strings')
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self._send_json(400, {'error': 'Expected {"barcodes": [...], "type": null}'})
+                return
+            self._handle(lambda: {'results': dict(zip(
+                barcodes, self.service.lookup([(b, barcode_type) for b in barcodes])))})
+        else:
+            self._send_json(404, {'error': 'Not found'})
+
+    def _handle(self, work, error_status=200):
+        """Run a request, mapping saturation and timeouts to 503 and 504
+
+        A result carrying an 'error' (such as an image that cannot be decoded)
+        is answered with error_status.
+        """
+        start = time.perf_counter()
+        endpoint = urlsplit(self.path).path.split('/')[1]
+        try:
+            body = work()
+            status = error_status if 'error' in body else 200
+        except (Overloaded, ServiceStopped) as e:
+            status, body = 503, {'error': str(e)}
+        except FutureTimeout:
+            status, body = 504, {'error': 'Timed out waiting for a result'}
+        except Exception as e:
+            logger.error(f"Error handling {self.path}: {str(e)}")
+            status, body = 500, {'error': str(e)}
+        metrics.observe('service_request_seconds', time.perf_counter() - start, endpoint=endpoint)
+        metrics.inc('service_requests_total', endpoint=endpoint, status=status)
+        self._send_json(status, body, {'Retry-After': '1'} if status == 503 else None)
+
+    def _send_json(self, status, payload, headers=None):
+        self._send(status, json.dumps(payload).encode('utf-8'), 'application/json', headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        logger.debug("%s - %s", self.address_string(), format % args)
+
+
+class ScanHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # listen backlog, so bursts of connections are not reset
+
+
+def make_server(service, host='0.0.0.0', port=8080):
+    """HTTP server bound to host:port that dispatches to service"""
+    server = ScanHTTPServer((host, port), ScanRequestHandler)
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve barcode scanning and product lookup over HTTP")
+    parser.add_argument('--host', default='0.0.0.0', help="Address to bind (default: 0.0.0.0)")
+    parser.add_argument('--port', type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument('--workers', '-j', type=int, help="Decode worker processes (default: all cores)")
+    parser.add_argument('--batch-size', type=int, default=16, help="Maximum items per micro-batch")
+    parser.add_argument('--batch-wait-ms', type=float, default=5.0,
+                        help="Longest wait for a micro-batch to fill, in milliseconds")
+    parser.add_argument('--max-pending', type=int, default=256,
+                        help="Queued requests per stage before answering 503")
+    parser.add_argument('--lookup-workers', type=int, default=16, help="Concurrent product lookups")
+    parser.add_argument('--timeout', type=float, default=30.0, help="Seconds a request may wait for its result")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    metrics.enable()
+    service = ScanService(workers=args.workers, max_batch_size=args.batch_size,
+                          max_wait=args.batch_wait_ms / 1000, max_pending=args.max_pending,
+                          lookup_workers=args.lookup_workers, request_timeout=args.timeout).start()
+    server = make_server(service, args.host, args.port)
+    logger.info(f"Listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,34 @@
+"""Per-process scanner for the decode worker pools.
+
+batch_scan and scan_service decode in ProcessPoolExecutor workers; each
+worker builds one BarcodeScanner in init_worker and reuses it for every
+image it is given.
+"""
+import importlib
+import logging
+
+from lazy_imports import lazy_import
+from metrics import metrics
+from scanner_core import BarcodeScanner
+
+cv2 = lazy_import('cv2')
+
+# One scanner per worker process, created by init_worker
+_scanner = None
+
+
+def init_worker(enable_metrics=False):
+    """Create the per-process scanner and keep OpenCV to one thread per process"""
+    global _scanner
+    cv2.setNumThreads(1)
+    # Import the decoder now so a missing zbar library fails the pool, not every image
+    importlib.import_module('pyzbar.pyzbar')
+    logging.getLogger('scanner_core').setLevel(logging.WARNING)
+    if enable_metrics:
+        metrics.enable()
+    _scanner = BarcodeScanner()
+
+
+def worker_scanner():
+    """The scanner of this worker process"""
+    return _scanner
@@ -0,0 +1,1225 @@
+"""Barcode decoding and product lookup, without any user interface.
+
+BarcodeScanner holds everything needed to decode barcodes from images and
+look up products; barcode_scanner.py adds the Streamlit app on top of it.
+OpenCV, NumPy, pyzbar and requests are imported lazily, on first use, so
+importing this module is cheap for workers and command line tools.
+"""
+import time
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+from collections import deque
+
+from lazy_imports import lazy_import
+from product_cache import ProductCache, normalize_barcode, GTIN_TYPES
+from gtin import is_valid_gtin, is_valid_symbol, expand_upce, to_product_code
+from metrics import metrics
+from preprocessing import PreprocessingPipeline, default_pipelines
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+pyzbar = lazy_import('pyzbar.pyzbar')
+requests = lazy_import('requests')
+
+logger = logging.getLogger(__name__)
+
+# Preprocessing steps, rotations and inversion combined into decode strategies.
+# The listed order is the default order used before any statistics exist.
+PREPROCESSORS = ['gray', 'otsu', 'clahe_adaptive', 'blur_adaptive']
+ROTATIONS = [0, 90, 180, 270]
+
+# pyzbar symbology -> barcode type handled by get_product_info
+SYMBOLOGY_TYPES = {
+    'EAN13': 'EAN13',
+    'ISBN13': 'EAN13',
+    'UPCA': 'UPC_A',
+    'EAN8': 'EAN8',
+    'UPCE': 'UPC_E',
+    'CODE128': 'CODE128',
+    'QRCODE': 'QRCODE',
+    'CODE39': 'CODE39'
+}
+
+# Barcode types whose lookups go to the network and are worth caching
+CACHEABLE_TYPES = {'EAN13', 'UPC_A', 'CODE128'}
+# Result type label for answers served from the offline product database
+OFFLINE_TYPE_LABELS = {'EAN13': 'EAN-13', 'UPC_A': 'EAN-13', 'CODE128': 'CODE128'}
+NOT_FOUND_ERRORS = {'Product not found in database', 'Product not found in any database'}
+
+
+def strategy_name(preprocessor, angle, inverted):
+    """Build the name used to identify a decode strategy"""
+    name = f"{preprocessor}/rot{angle}"
+    return name + "/inv" if inverted else name
+
+
+def default_strategies():
+    """List all decode strategies, cheapest and most likely first"""
+    return [
+        (preprocessor, angle, inverted)
+        for angle in ROTATIONS
+        for inverted in (False, True)
+        for preprocessor in PREPROCESSORS
+    ]
+
+
+def is_ean13(symbol):
+    """Accept only 13-digit EAN-13 symbols with a valid check digit"""
+    return len(symbol['data']) == 13 and is_valid_gtin(symbol['data'])
+
+
+def lookup_type(symbology):
+    """Map a pyzbar symbology to the barcode type used by get_product_info"""
+    return SYMBOLOGY_TYPES.get(symbology)
+
+
+def parse_retry_after(value, default):
+    """Seconds to wait from a Retry-After header: delay seconds or an HTTP date"""
+    if value is None:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+def unrotate_point(x, y, angle, width, height):
+    """Map a point in a rotated image back to the unrotated width x height image"""
+    if angle == 90:
+        return (y, height - 1 - x)
+    if angle == 180:
+        return (width - 1 - x, height - 1 - y)
+    if angle == 270:
+        return (width - 1 - y, x)
+    return (x, y)
+
+
+def polygon_rect(polygon):
+    """Axis-aligned bounding box (x, y, w, h) of a polygon"""
+    xs = [p[0] for p in polygon]
+    ys = [p[1] for p in polygon]
+    return (min(xs), min(ys), max(xs) - min(xs), max(ys) - min(ys))
+
+
+class ImagePyramid:
+    """Lazily built resolution levels of one image, smallest first
+
+    Each level halves the width of the one above it (INTER_AREA), down to
+    min_width; the last level is the image itself. Levels and their
+    preprocessed images are computed once and kept for the life of the pyramid.
+    """
+
+    def __init__(self, image, min_width=640):
+        self.image = image
+        widths = [image.shape[1]]
+        while widths[-1] // 2 >= min_width:
+            widths.append(widths[-1] // 2)
+        self.count = len(widths)
+        self._images = {self.count - 1: image}  # level index -> image
+        self._prepared = [{} for _ in range(self.count)]  # level index -> {preprocessor: image}
+
+    def level(self, index):
+        """Image at a level (0 = smallest), derived from the next larger level"""
+        if index not in self._images:
+            larger = self.level(index + 1)
+            self._images[index] = cv2.resize(larger, (larger.shape[1] // 2, larger.shape[0] // 2),
+                                             interpolation=cv2.INTER_AREA)
+        return self._images[index]
+
+    def scale(self, index):
+        """Size of a level relative to the original image"""
+        return self.level(index).shape[1] / self.image.shape[1]
+
+    def prepared(self, index):
+        """Preprocessed-image cache shared by every strategy run on a level"""
+        return self._prepared[index]
+
+
+class ScanDeadline:
+    """Time budget and cancellation flag for one scan
+
+    Every step of a scan checks expired() before it starts, so a scan stops
+    within one decode attempt of its budget running out or of cancel() being
+    called from another thread. The timeout is a soft limit: the setup of a
+    scan (describing the image, localizing regions) and an attempt already
+    running are not interrupted. Attempts whose expected preprocessing and
+    decode time exceeds the remaining budget are skipped, so only a strategy
+    or preprocessor that has never run before can overrun it by more than
+    the estimation error. reason says why it stopped ('timeout' or
+    'cancelled'); attempts and skipped count the strategies run and skipped.
+    A scan that only looked at part of the image (e.g. tracked regions) sets
+    partial, so it is not taken as superseding a full scan of an older frame.
+    """
+
+    def __init__(self, timeout=None, cancel_event=None):
+        self.timeout = timeout  # seconds, or None for no time limit
+        self.started = time.perf_counter()
+        self.deadline = None if timeout is None else self.started + timeout
+        self.cancel_event = cancel_event or threading.Event()
+        self.reason = None
+        self.attempts = 0
+        self.skipped = 0
+        self.partial = False
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def remaining(self):
+        """Seconds left in the budget (infinite without a timeout)"""
+        if self.deadline is None:
+            return float('inf')
+        return max(0.0, self.deadline - time.perf_counter())
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+    def expired(self):
+        if self.reason is None:
+            if self.cancel_event.is_set():
+                self.reason = 'cancelled'
+            elif self.deadline is not None and time.perf_counter() >= self.deadline:
+                self.reason = 'timeout'
+        return self.reason is not None
+
+
+class StrategyScheduler:
+    """Orders decode strategies by recent success rate and records their latency"""
+
+    def __init__(self, strategies=None, window=50):
+        self.strategies = list(strategies or default_strategies())
+        self.window = window  # number of recent attempts used for the hit rate
+        self._lock = threading.Lock()
+        self._recent = {s: deque(maxlen=window) for s in self.strategies}
+        self._stats = {s: {'attempts': 0, 'hits': 0, 'total_time': 0.0} for s in self.strategies}
+        self._cost = {s: deque(maxlen=window) for s in self.strategies}  # recent seconds per pixel
+
+    def features(self, image):
+        """Per-image context passed to order() and record_success()
+
+        Ordering by hit rate alone needs none; strategy_model.py has a
+        scheduler that also looks at the image.
+        """
+        return None
+
+    def order(self, rotations=None, features=None):
+        """Return strategies sorted by recent hit rate (default order breaks ties)
+
+        If rotations is given, only strategies using one of those angles are returned.
+        """
+        strategies = self.strategies
+        if rotations is not None:
+            strategies = [s for s in strategies if s[1] in rotations]
+        with self._lock:
+            rates = {s: self._recent_rate(s) for s in strategies}
+        return sorted(strategies, key=lambda s: -rates[s])
+
+    def record(self, strategy, success, elapsed, pixels=None):
+        """Record the outcome and duration (seconds) of one decode attempt on an image of pixels pixels"""
+        with self._lock:
+            self._recent[strategy].append(1 if success else 0)
+            if pixels:
+                self._cost[strategy].append(elapsed / pixels)
+            stats = self._stats[strategy]
+            stats['attempts'] += 1
+            stats['total_time'] += elapsed
+            if success:
+                stats['hits'] += 1
+
+    def record_attempt(self, features):
+        """Called after every decode attempt on an image, pyramid probes included, with its features()"""
+
+    def record_success(self, features, strategy, sample=True):
+        """Called with the strategy that decoded an image and that image's features()
+
+        sample is False for passes that should not be learned from, such as
+        re-reads of a tracked region on every frame.
+        """
+
+    def expected_latency(self, strategy, pixels):
+        """Expected duration (seconds) of a strategy on an image of pixels pixels, 0 before any attempt"""
+        with self._lock:
+            cost = self._cost[strategy]
+            return pixels * sum(cost) / len(cost) if cost else 0.0
+
+    def get_stats(self):
+        """Per-strategy hit rates and latencies, keyed by strategy name"""
+        with self._lock:
+            report = {}
+            for s in self.strategies:
+                stats = self._stats[s]
+                attempts = stats['attempts']
+                report[strategy_name(*s)] = {
+                    'attempts': attempts,
+                    'hits': stats['hits'],
+                    'hit_rate': stats['hits'] / attempts if attempts else 0.0,
+                    'recent_hit_rate': self._recent_rate(s),
+                    'avg_latency_ms': 1000 * stats['total_time'] / attempts if attempts else 0.0
+                }
+            return report
+
+    def reset(self):
+        """Forget all recorded outcomes"""
+        with self._lock:
+            for s in self.strategies:
+                self._recent[s].clear()
+                self._stats[s] = {'attempts': 0, 'hits': 0, 'total_time': 0.0}
+                self._cost[s].clear()
+
+    def _recent_rate(self, strategy):
+        recent = self._recent[strategy]
+        return sum(recent) / len(recent) if recent else 0.0
+
+
+class BarcodeScanner:
+    def __init__(self, strategy_scheduler=None, product_cache=None, offline_db=None, preprocessors=None,
+                 rate_limiter=None):
+        self.target_decode_rate = 10  # webcam decode attempts per second
+        self.scan_timeout = 0.5  # webcam: seconds one frame's scan may take before it is abandoned
+        self.decode_workers = 2  # persistent webcam decode threads
+        self.debounce_seconds = 5  # continuous mode: seconds before a barcode is reported again
+        self.max_retries = 3
+        self.retry_delay = 1  # seconds between retries
+        self.min_barcode_size = 100  # minimum barcode size in pixels
+        self.api_timeout = 5  # seconds
+        # product_cache=False turns lookup caching off
+        self.product_cache = ProductCache() if product_cache is None else (
+            None if product_cache is False else product_cache)
+        self.offline_db = offline_db  # local Open Food Facts index consulted before the network
+        self.rate_limiter = rate_limiter  # SharedRateLimiter pacing API requests across processes
+        self.rate_limit_wait = 10  # seconds a lookup may wait for a rate limit token
+        self.lookup_mode = 'sequential'  # 'concurrent' queries all CODE128 endpoints at once
+        self.pool_size = 10  # keep-alive connections per host
+        self._session = None  # pooled requests.Session, created on first lookup
+        self._session_lock = threading.Lock()
+        self._executors = {}  # name -> ThreadPoolExecutor for lookups, created on first use
+        self._executor_lock = threading.Lock()
+        self.strategy_scheduler = strategy_scheduler or StrategyScheduler()
+        # Preprocessor name -> PreprocessingPipeline applied to the shared grayscale image
+        self.preprocessors = preprocessors or default_pipelines()
+        self.grayscale = PreprocessingPipeline(['gray'])
+        # ('preprocess', name) or ('decode', strategy) -> recent seconds per pixel on any
+        # pyramid level, for fitting attempts into a scan's time budget; ('decode', None)
+        # covers every strategy
+        self._costs = {}
+        self._costs_lock = threading.Lock()
+        self.use_localization = True  # decode candidate regions before the full frame
+        self.max_regions = 3  # candidate regions tried per image
+        self.localization_width = 640  # working width for region localization
+        self.min_region_score = 0.15  # regions below this barcode-likeness are ignored
+        self.multi_scale = True  # decode large images from a downscaled copy first
+        self.pyramid_min_width = 640  # smallest pyramid level width in pixels
+        self.pyramid_probe_strategies = 8  # strategies tried on each level below full resolution
+
+    def preprocess_image(self, image):
+        """Enhanced image preprocessing specifically for barcode detection
+
+        Contrast enhancement, denoising, adaptive thresholding and a morphological
+        close (the 'clahe_adaptive' pipeline); returns a new array.
+        """
+        try:
+            return self._apply_preprocessor(image, 'clahe_adaptive', {}).copy()
+        except Exception as e:
+            logger.error(f"Error in image preprocessing: {str(e)}")
+            return image
+
+    def is_barcode_valid(self, barcode_data):
+        """Validate barcode format and content"""
+        if not barcode_data:
+            return False
+        # Numeric codes of a GS1 length must carry a correct check digit
+        if barcode_data.isdigit() and len(barcode_data) in (8, 12, 13, 14):
+            return is_valid_gtin(barcode_data)
+        return True
+
+    def scan_barcode(self, image, deadline=None):
+        """Enhanced barcode detection optimized for EAN-13
+
+        With a ScanDeadline the scan gives up (returning None) once its time
+        budget runs out or it is cancelled.
+        """
+        symbol = self.find_ean13(image, deadline)
+        return symbol['data'] if symbol else None
+
+    def find_ean13(self, image, deadline=None):
+        """Like scan_barcode, but returns the decoded symbol (with its 'polygon') or None"""
+        try:
+            with metrics.timer('scanner_scan_seconds', mode='ean13'):
+                symbols = self._scan_ean13(image, deadline)
+
+            if symbols:
+                metrics.inc('scanner_scans_total', mode='ean13', result='hit')
+                logger.info(f"Found valid EAN-13 barcode: {symbols[0]['data']} "
+                            f"(strategy {symbols[0]['strategy']})")
+                return symbols[0]
+
+            if deadline is not None and deadline.expired():
+                metrics.inc('scanner_scans_total', mode='ean13', result=deadline.reason)
+                logger.info(f"Scan stopped early ({deadline.reason}) after {deadline.attempts} attempts")
+                return None
+            metrics.inc('scanner_scans_total', mode='ean13', result='miss')
+            logger.warning("No valid barcode found after all attempts")
+            return None
+
+        except ImportError:
+            # A missing decoder (pyzbar, libzbar) is a setup error, not an unreadable image
+            raise
+        except Exception as e:
+            logger.error(f"Error in barcode scanning: {str(e)}")
+            return None
+
+    def _scan_ean13(self, image, deadline=None):
+        """Localized regions first, then the full frame; returns the EAN-13 symbols found"""
+        symbols = []
+        # Described once per image; every region and the fallback are ordered by it
+        features = self.strategy_scheduler.features(image)
+
+        # Decode the most barcode-like regions first, in their estimated orientation
+        if self.use_localization:
+            for region in self.locate_barcode_regions(image, self.max_regions):
+                if deadline is not None and deadline.expired():
+                    return []
+                x, y, w, h = region['bbox']
+                symbols = self._run_strategies(image[y:y + h, x:x + w], region['rotations'],
+                                               accept=is_ean13, offset=(x, y), deadline=deadline,
+                                               features=features)
+                if symbols:
+                    break
+
+        # Fall back to the full frame with every strategy
+        if not symbols:
+            symbols = self._run_strategies(image, accept=is_ean13, deadline=deadline, features=features)
+        return symbols
+
+    def scan_all(self, image, deadline=None, features=None):
+        """Decode every barcode in an image
+
+        Returns one dict per unique symbol with its 'data', pyzbar symbology
+        ('type'), 'polygon' and 'rect' in image coordinates, and the 'strategy'
+        that decoded it. With a ScanDeadline, the symbols found before the
+        budget ran out (or the scan was cancelled) are returned. features are
+        the image's strategy_scheduler.features(), computed here if not given.
+        """
+        try:
+            start = time.perf_counter()
+            found = {}
+            if features is None:
+                features = self.strategy_scheduler.features(image)
+
+            def add(symbols):
+                for symbol in symbols:
+                    found.setdefault((symbol['type'], symbol['data']), symbol)
+
+            add(self._run_strategies(image, deadline=deadline, features=features))
+
+            # Give every candidate region without a decoded symbol its own pass
+            if self.use_localization and not (deadline is not None and deadline.expired()):
+                for region in self.locate_barcode_regions(image):
+                    if deadline is not None and deadline.expired():
+                        break
+                    if self._region_covered(region['bbox'], found.values()):
+                        continue
+                    x, y, w, h = region['bbox']
+                    add(self._run_strategies(image[y:y + h, x:x + w], region['rotations'], offset=(x, y),
+                                             deadline=deadline, features=features))
+
+            metrics.observe('scanner_scan_seconds', time.perf_counter() - start, mode='all')
+            metrics.inc('scanner_scans_total', mode='all', result='hit' if found else 'miss')
+            logger.info(f"Found {len(found)} barcodes")
+            return list(found.values())
+
+        except ImportError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in barcode scanning: {str(e)}")
+            return []
+
+    def scan_region(self, image, bbox, rotations=None, deadline=None, features=None):
+        """Decode every symbol inside bbox (x, y, w, h); coordinates stay in image space
+
+        features are the whole image's strategy_scheduler.features(), if any.
+        Hits here are not learned from: a tracked region is re-read on every
+        frame and would fill the strategy history with copies of one image.
+        """
+        try:
+            x, y, w, h = bbox
+            return self._run_strategies(image[y:y + h, x:x + w], rotations, offset=(x, y), deadline=deadline,
+                                        features=features, sample=False)
+        except ImportError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in region scanning: {str(e)}")
+            return []
+
+    def scan(self, image, timeout=None, cancel_event=None, find_all=False):
+        """Time-budgeted scan that reports how it ended
+
+        timeout is the budget in seconds, a soft limit (see ScanDeadline);
+        setting cancel_event from another thread abandons the scan. Decodes EAN-13 like scan_barcode, or every
+        symbol like scan_all with find_all=True. Returns a dict with the
+        'symbols' found, a 'status' ('found', 'not_found', 'timeout' or
+        'cancelled'), 'elapsed_ms', and the strategy 'attempts' and 'skipped'.
+        A find_all scan that runs out of time keeps the symbols found so far.
+        """
+        deadline = ScanDeadline(timeout, cancel_event)
+        try:
+            symbols = self.scan_all(image, deadline) if find_all else self._scan_ean13(image, deadline)
+        except ImportError:
+            raise
+        except Exception as e:
+            logger.error(f"Error in barcode scanning: {str(e)}")
+            symbols = []
+
+        # Strategies skipped for lack of time also leave the scan incomplete
+        reason = deadline.reason or ('timeout' if deadline.skipped else None)
+        if reason is not None and (find_all or not symbols):
+            status = reason
+        else:
+            status = 'found' if symbols else 'not_found'
+        metrics.inc('scanner_deadline_scans_total', status=status)
+        return {
+            'symbols': symbols,
+            'status': status,
+            'elapsed_ms': round(1000 * deadline.elapsed(), 2),
+            'attempts': deadline.attempts,
+            'skipped': deadline.skipped
+        }
+
+    def resolve_all(self, image):
+        """Decode every barcode in an image and look up each one by its real symbology"""
+        symbols = self.scan_all(image)
+        if not symbols:
+            return symbols
+
+        # Not the fan-out pool: a CODE128 lookup running here may submit its endpoints to that one
+        executor = self._executor('resolve')
+        infos = executor.map(lambda s: self.get_product_info(s['data'], lookup_type(s['type'])), symbols)
+        for symbol, product_info in zip(symbols, infos):
+            symbol['product_info'] = product_info
+        return symbols
+
+    def _region_covered(self, bbox, symbols):
+        """Check whether a decoded symbol already lies inside a region"""
+        x, y, w, h = bbox
+        for symbol in symbols:
+            sx, sy, sw, sh = symbol['rect']
+            cx, cy = sx + sw / 2, sy + sh / 2
+            if x <= cx <= x + w and y <= cy <= y + h:
+                return True
+        return False
+
+    def _run_strategies(self, image, rotations=None, accept=None, offset=(0, 0), deadline=None, features=None,
+                        sample=True):
+        """Try decode strategies in scheduled order and stop at the first hit
+
+        Large images are decoded coarse to fine: the best scheduled strategies
+        run on each downscaled pyramid level, and every strategy runs at full
+        resolution only if nothing was found below it.
+
+        Returns the symbols found by the first successful strategy (those passing
+        accept, if given), with coordinates shifted by offset, or an empty list.
+        A deadline stops the cascade once it expires and skips strategies that
+        usually take longer than the time remaining. features (from
+        strategy_scheduler.features() of the whole image) inform the order;
+        sample is passed on to strategy_scheduler.record_success().
+        """
+        # Scale the image if it's too small
+        min_width = 640
+        scale = 1.0
+        if image.shape[1] < min_width:
+            scale = min_width / image.shape[1]
+            image = cv2.resize(image, None, fx=scale, fy=scale)
+
+        strategies = self.strategy_scheduler.order(rotations, features)
+        symbols = []
+        if not self.multi_scale:
+            symbols = self._decode_level(image, strategies, {}, scale, accept, offset, deadline, features=features)
+        else:
+            pyramid = ImagePyramid(image, self.pyramid_min_width)
+            for index in range(pyramid.count):
+                if deadline is not None and deadline.expired():
+                    break
+                full_resolution = index == pyramid.count - 1
+                symbols = self._decode_level(pyramid.level(index),
+                                             strategies if full_resolution
+                                             else strategies[:self.pyramid_probe_strategies],
+                                             pyramid.prepared(index), scale * pyramid.scale(index), accept,
+                                             offset, deadline, probe=not full_resolution, features=features)
+                if symbols:
+                    metrics.inc('scanner_pyramid_hits_total', scale=f'{pyramid.scale(index):.3g}')
+                    break
+
+        if symbols and features is not None:
+            name = symbols[0]['strategy']
+            strategy = next(s for s in strategies if strategy_name(*s) == name)
+            self.strategy_scheduler.record_success(features, strategy, sample)
+        return symbols
+
+    def _decode_level(self, image, strategies, prepared, scale, accept, offset, deadline=None, probe=False,
+                      features=None):
+        """Run strategies on one image; scale maps its coordinates back to the caller's image
+
+        probe marks a downscaled pyramid level. A miss there says little about
+        the strategy (it gets another go at full resolution), so only hits are
+        recorded, and its timings are kept out of the per-pixel cost estimate.
+        Preprocessing is timed separately from decoding, on every level.
+        """
+        pixels = image.shape[0] * image.shape[1]
+        for strategy in strategies:
+            preprocessor = strategy[0]
+            if deadline is not None:
+                if deadline.expired():
+                    break
+                # Skip strategies that would not finish in time; cheaper ones may still fit
+                if self._expected_attempt_latency(strategy, pixels, prepared, probe) > deadline.remaining():
+                    deadline.skipped += 1
+                    continue
+                deadline.attempts += 1
+            if preprocessor not in prepared:
+                self._prepare(image, preprocessor, prepared)
+            start = time.perf_counter()
+            # Misreads with a wrong check digit are dropped before anyone looks them up
+            symbols = [s for s in self._try_strategy(image, strategy, prepared) if is_valid_symbol(s)]
+            if accept is not None:
+                symbols = [s for s in symbols if accept(s)]
+            elapsed = time.perf_counter() - start
+            self._record_cost(('decode', strategy), elapsed, pixels)
+            self._record_cost(('decode', None), elapsed, pixels)
+            if not probe:
+                self.strategy_scheduler.record(strategy, bool(symbols), elapsed, pixels)
+            elif symbols:
+                self.strategy_scheduler.record(strategy, True, elapsed)
+            self.strategy_scheduler.record_attempt(features)
+            if metrics.enabled:
+                metrics.observe('scanner_decode_attempt_seconds', elapsed, strategy=strategy_name(*strategy))
+                metrics.inc('scanner_decode_attempts_total', rotation=strategy[1],
+                            result='hit' if symbols else 'miss')
+            if symbols:
+                name = strategy_name(*strategy)
+                for symbol in symbols:
+                    symbol['polygon'] = [(int(round(px / scale + offset[0])), int(round(py / scale + offset[1])))
+                                         for px, py in symbol['polygon']]
+                    symbol['rect'] = polygon_rect(symbol['polygon'])
+                    symbol['strategy'] = name
+                return symbols
+        return []
+
+    def get_strategy_stats(self):
+        """Return per-strategy hit rates and latencies"""
+        return self.strategy_scheduler.get_stats()
+
+    def _prepare(self, image, preprocessor, prepared):
+        """Run a preprocessor on an image into prepared, recording its cost"""
+        start = time.perf_counter()
+        prepared[preprocessor] = self._apply_preprocessor(image, preprocessor, prepared)
+        elapsed = time.perf_counter() - start
+        metrics.observe('scanner_preprocess_seconds', elapsed, preprocessor=preprocessor)
+        self._record_cost(('preprocess', preprocessor), elapsed, image.shape[0] * image.shape[1])
+
+    def _expected_attempt_latency(self, strategy, pixels, prepared, probe=False):
+        """Expected duration (seconds) of one attempt, preprocessing included; 0 if nothing is known"""
+        expected = 0.0 if probe else self.strategy_scheduler.expected_latency(strategy, pixels)
+        if not expected:
+            # Probes, and strategies never run at full resolution, go by their cost on any
+            # level, and strategies never run at all by that of every strategy
+            expected = (self._expected_cost(('decode', strategy), pixels)
+                        or self._expected_cost(('decode', None), pixels))
+        if strategy[0] not in prepared:
+            expected += self._expected_cost(('preprocess', strategy[0]), pixels)
+        return expected
+
+    def _record_cost(self, key, elapsed, pixels):
+        with self._costs_lock:
+            self._costs.setdefault(key, deque(maxlen=50)).append(elapsed / pixels)
+
+    def _expected_cost(self, key, pixels):
+        with self._costs_lock:
+            cost = self._costs.get(key)
+            return pixels * sum(cost) / len(cost) if cost else 0.0
+
+    def _try_strategy(self, image, strategy, prepared):
+        """Run a single decode strategy and return the decoded symbols
+
+        Polygons are mapped back to the orientation of the image passed in.
+        """
+        preprocessor, angle, inverted = strategy
+        if preprocessor not in prepared:
+            with metrics.timer('scanner_preprocess_seconds', preprocessor=preprocessor):
+                prepared[preprocessor] = self._apply_preprocessor(image, preprocessor, prepared)
+        processed_image = prepared[preprocessor]
+        height, width = processed_image.shape[:2]
+
+        if angle > 0:
+            processed_image = cv2.rotate(processed_image,
+                                         cv2.ROTATE_90_CLOCKWISE if angle == 90 else
+                                         cv2.ROTATE_180 if angle == 180 else
+                                         cv2.ROTATE_90_COUNTERCLOCKWISE)
+        if inverted:
+            processed_image = cv2.bitwise_not(processed_image)
+
+        symbols = []
+        for barcode in pyzbar.decode(processed_image):
+            symbols.append({
+                'data': barcode.data.decode('utf-8', errors='replace'),
+                'type': barcode.type,
+                'polygon': [unrotate_point(p.x, p.y, angle, width, height) for p in barcode.polygon]
+            })
+        return symbols
+
+    def _apply_preprocessor(self, image, preprocessor, prepared):
+        """Produce the single-channel image a preprocessing strategy decodes from
+
+        The grayscale conversion is stored in prepared under 'gray' and shared
+        by every preprocessor of the same image. The result may be a reused
+        pipeline buffer, valid until the next image of the same size.
+        """
+        if 'gray' not in prepared:
+            prepared['gray'] = self.grayscale.apply(image)
+        return self.preprocessors[preprocessor].apply(prepared['gray'])
+
+    def get_product_info(self, barcode, barcode_type=None):
+        """Enhanced product information retrieval with format-specific handling and improved error handling"""
+        try:
+            barcode, barcode_type, cache_key, result = self._begin_lookup(barcode, barcode_type)
+            if result is not None:
+                return result
+
+            # Get the appropriate handler
+            handler = self._api_handlers().get(barcode_type, self._handle_unknown)
+            logger.debug(f"Using handler: {handler.__name__}")
+            
+            result = handler(barcode)
+            self._finish_lookup(cache_key, result)
+            logger.info(f"Successfully retrieved product info for {barcode_type} barcode: {barcode}")
+            return result
+            
+        except Exception as e:
+            return self._lookup_error(e, barcode, barcode_type)
+
+    def _api_handlers(self):
+        """Format-specific API endpoints and handling"""
+        return {
+            'EAN13': self._handle_ean13,
+            'UPC_A': self._handle_upc_a,
+            'CODE128': self._handle_code128,
+            'QRCODE': self._handle_qrcode,
+            'CODE39': self._handle_code39
+        }
+
+    def _begin_lookup(self, barcode, barcode_type):
+        """Validate a lookup and consult the cache and offline database
+
+        Returns (barcode, barcode_type, cache_key, result); EAN/UPC codes come back
+        in the EAN-13 (or GTIN-8/GTIN-14) form the product APIs expect. result is
+        set when the lookup is already answered (invalid input, unsupported type,
+        cache or offline hit).
+        """
+        logger.info(f"Starting product info retrieval for barcode: {barcode}")
+
+        # Validate barcode input
+        if not barcode or not isinstance(barcode, str):
+            logger.error(f"Invalid barcode input: {barcode}")
+            return barcode, barcode_type, None, {
+                'error': 'Invalid barcode format',
+                'details': 'Barcode must be a non-empty string',
+                'barcode': barcode
+            }
+
+        # If barcode_type is not provided, try to determine it
+        if not barcode_type:
+            logger.debug("Barcode type not provided, attempting to determine type")
+            barcode_type = self._determine_barcode_type(barcode)
+            logger.info(f"Determined barcode type: {barcode_type}")
+
+        # Reject misread EAN/UPC codes before they cost a cache or network lookup,
+        # then look every GS1 code up as EAN-13 (EAN-8 and UPC-E included)
+        if barcode_type in GTIN_TYPES:
+            product_code = to_product_code(barcode, barcode_type)
+            if product_code is None:
+                logger.warning(f"Rejected {barcode_type} barcode with an invalid check digit: {barcode}")
+                return barcode, barcode_type, None, {
+                    'error': 'Invalid check digit',
+                    'details': f'{barcode} is not a valid {barcode_type} code',
+                    'barcode': barcode
+                }
+            barcode, barcode_type = product_code, 'EAN13'
+
+        # Validate barcode type
+        supported_types = list(self._api_handlers().keys())
+        if barcode_type not in supported_types:
+            logger.warning(f"Unsupported barcode type: {barcode_type}")
+            return barcode, barcode_type, None, {
+                'error': 'Unsupported barcode type',
+                'details': f'Barcode type {barcode_type} is not supported',
+                'supported_types': supported_types,
+                'barcode': barcode
+            }
+
+        # Serve repeated lookups from the product cache
+        cache_key = None
+        if self.product_cache is not None and barcode_type in CACHEABLE_TYPES:
+            cache_key = normalize_barcode(barcode, barcode_type)
+            cached = self.product_cache.get(cache_key)
+            metrics.inc('lookup_cache_total', result='miss' if cached is None else 'hit')
+            if cached is not None:
+                logger.info(f"Product info for {barcode} served from cache")
+                return barcode, barcode_type, cache_key, cached
+
+        # Answer from the offline product database when it has the product
+        if self.offline_db is not None and barcode_type in OFFLINE_TYPE_LABELS:
+            product = self.offline_db.lookup(barcode)
+            metrics.inc('lookup_offline_total', result='miss' if product is None else 'hit')
+            if product is not None:
+                logger.info(f"Product info for {barcode} served from offline database")
+                return barcode, barcode_type, cache_key, self._parse_product_data(
+                    {'product': product}, OFFLINE_TYPE_LABELS[barcode_type])
+
+        return barcode, barcode_type, cache_key, None
+
+    def _finish_lookup(self, cache_key, result):
+        """Cache found products and negative answers"""
+        if cache_key is None:
+            return
+        if 'error' not in result:
+            self.product_cache.set(cache_key, result)
+        elif result['error'] in NOT_FOUND_ERRORS:
+            self.product_cache.set(cache_key, result, negative=True)
+
+    def _lookup_error(self, e, barcode, barcode_type):
+        """Build the error result for an unexpected lookup failure"""
+        error_details = {
+            'error': str(e),
+            'type': type(e).__name__,
+            'barcode': barcode,
+            'barcode_type': barcode_type,
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+        logger.error(f"Error in product info retrieval: {error_details}")
+        return {
+            'error': 'Failed to retrieve product information',
+            'details': error_details
+        }
+
+    def _determine_barcode_type(self, barcode):
+        """Determine barcode type based on format and length"""
+        if len(barcode) == 13 and barcode.isdigit():
+            return 'EAN13'
+        elif len(barcode) == 12 and barcode.isdigit():
+            return 'UPC_A'
+        elif len(barcode) == 14 and barcode.isdigit():
+            return 'GTIN14'
+        elif len(barcode) == 8 and barcode.isdigit():
+            # EAN-8 and UPC-E are both 8 digits; the check digit tells them apart
+            if not is_valid_gtin(barcode) and expand_upce(barcode) is not None:
+                return 'UPC_E'
+            return 'EAN8'
+        elif len(barcode) > 0 and all(c in '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ-. $/+%' for c in barcode):
+            return 'CODE39'
+        elif len(barcode) > 0:  # Default to CODE128 for other cases
+            return 'CODE128'
+        return 'UNKNOWN'
+
+    def _handle_ean13(self, barcode):
+        """Handle EAN-13 barcodes with Open Food Facts API"""
+        url = f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json"
+        return self._make_api_request(url, 'EAN-13')
+
+    def _handle_upc_a(self, barcode):
+        """Handle UPC-A barcodes by converting to EAN-13"""
+        # Convert UPC-A to EAN-13 by adding '0' prefix
+        ean13_barcode = '0' + barcode
+        return self._handle_ean13(ean13_barcode)
+
+    def _handle_code128(self, barcode):
+        """Handle CODE128 barcodes with enhanced error handling and logging"""
+        logger.info(f"Processing CODE128 barcode: {barcode}")
+        
+        endpoints = self._code128_endpoints(barcode)
+        if self.lookup_mode == 'concurrent':
+            result, errors = self._fan_out_lookup(endpoints, 'CODE128')
+            if result is not None:
+                return result
+        else:
+            errors = {}
+            for endpoint in endpoints:
+                logger.info(f"Trying {endpoint['name']} API")
+                result = self._make_api_request(endpoint['url'], 'CODE128')
+
+                if result.get('error') not in NOT_FOUND_ERRORS:
+                    logger.info(f"Successfully found product in {endpoint['name']}")
+                    return result
+
+                errors[endpoint['name']] = result['error']
+                logger.warning(f"Product not found in {endpoint['name']}")
+        
+        error_msg = 'Product not found in any database'
+        logger.error(error_msg)
+        return {
+            'error': error_msg,
+            'details': {
+                'barcode': barcode,
+                'type': 'CODE128',
+                'attempted_apis': [e['name'] for e in endpoints],
+                'errors': errors
+            }
+        }
+
+    def _code128_endpoints(self, barcode):
+        """Product databases queried for CODE128 barcodes, in preference order"""
+        return [
+            {
+                'url': f"https://world.openfoodfacts.org/api/v0/product/{barcode}.json",
+                'name': 'Open Food Facts'
+            },
+            {
+                'url': f"https://api.upcitemdb.com/prod/trial/lookup?upc={barcode}",
+                'name': 'UPC Item DB'
+            }
+        ]
+
+    def _fan_out_lookup(self, endpoints, barcode_type):
+        """Query all endpoints at once and return the first successful result
+
+        Returns (result, errors): result is None when no endpoint succeeded, and
+        errors maps endpoint names to the error each one returned.
+        """
+        executor = self._executor('lookup')
+        cancel_event = threading.Event()
+        futures = {
+            executor.submit(self._make_api_request, e['url'], barcode_type, cancel_event): e['name']
+            for e in endpoints
+        }
+        errors = {}
+        try:
+            for future in as_completed(futures):
+                name = futures[future]
+                result = future.result()
+                if 'error' not in result:
+                    logger.info(f"Successfully found product in {name}")
+                    return result, errors
+                errors[name] = result['error']
+                logger.warning(f"{name} lookup failed: {result['error']}")
+        finally:
+            # Stop the slower lookups: queued ones never start, running ones stop retrying
+            cancel_event.set()
+            for future in futures:
+                future.cancel()
+        return None, errors
+
+    def _executor(self, name):
+        """Thread pool of pool_size threads kept for lookups of one kind, created on first use"""
+        with self._executor_lock:
+            executor = self._executors.get(name)
+            if executor is None:
+                executor = self._executors[name] = ThreadPoolExecutor(max_workers=self.pool_size,
+                                                                      thread_name_prefix=name)
+            return executor
+
+    @property
+    def session(self):
+        """Shared keep-alive session, created on first use"""
+        if self._session is None:
+            with self._session_lock:
+                if self._session is None:
+                    self._session = self._create_session()
+        return self._session
+
+    @session.setter
+    def session(self, session):
+        self._session = session
+
+    def _create_session(self):
+        """Create a keep-alive HTTP session with a connection pool per host"""
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def _wait(self, seconds, cancel_event=None):
+        """Sleep before a retry; returns True if the request was cancelled meanwhile"""
+        if cancel_event is None:
+            time.sleep(seconds)
+            return False
+        return cancel_event.wait(seconds)
+
+    def _handle_qrcode(self, barcode):
+        """Handle QR codes with enhanced validation and logging"""
+        logger.info(f"Processing QR code: {barcode}")
+        
+        try:
+            if barcode.startswith(('http://', 'https://')):
+                logger.info("QR code contains URL")
+                return {
+                    'type': 'URL',
+                    'url': barcode,
+                    'message': 'QR code contains a URL',
+                    'validation': {
+                        'is_valid_url': True,
+                        'protocol': barcode.split('://')[0]
+                    }
+                }
+            else:
+                logger.info("QR code contains text content")
+                return {
+                    'type': 'TEXT',
+                    'content': barcode,
+                    'message': 'QR code contains text content',
+                    'validation': {
+                        'length': len(barcode),
+                        'is_printable': all(c.isprintable() for c in barcode)
+                    }
+                }
+        except Exception as e:
+            error_msg = f"Error processing QR code: {str(e)}"
+            logger.error(error_msg)
+            return {
+                'error': error_msg,
+                'details': {
+                    'barcode': barcode,
+                    'type': 'QRCODE'
+                }
+            }
+
+    def _handle_code39(self, barcode):
+        """Handle CODE39 barcodes with inventory lookup"""
+        # Example implementation for inventory system
+        return {
+            'type': 'CODE39',
+            'barcode': barcode,
+            'message': 'CODE39 barcode detected',
+            'inventory_info': self._lookup_inventory(barcode)
+        }
+
+    def _handle_unknown(self, barcode):
+        """Handle unknown barcode formats"""
+        return {
+            'error': f'Unsupported barcode format: {barcode}',
+            'suggestion': 'Please use EAN-13, UPC-A, CODE128, or QR code'
+        }
+
+    def _make_api_request(self, url, barcode_type, cancel_event=None):
+        """Make API request with enhanced retry mechanism and detailed logging"""
+        # Only build log and metric details when they will actually be used
+        if logger.isEnabledFor(logging.INFO):
+            request_details = {
+                'url': url,
+                'barcode_type': barcode_type,
+                'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
+            }
+            logger.info(f"Starting API request: {request_details}")
+        host = urlsplit(url).netloc if metrics.enabled or self.rate_limiter is not None else None
+        
+        for attempt in range(self.max_retries):
+            if cancel_event is not None and cancel_event.is_set():
+                return {'error': 'Request cancelled'}
+            if attempt > 0:
+                metrics.inc('lookup_api_retries_total', host=host)
+            if self.rate_limiter is not None and not self.rate_limiter.acquire(
+                    host, self.rate_limit_wait, cancel_event):
+                if cancel_event is not None and cancel_event.is_set():
+                    return {'error': 'Request cancelled'}
+                return {'error': 'Rate limit exceeded'}
+            try:
+                logger.debug("Attempt %d/%d", attempt + 1, self.max_retries)
+                start = time.perf_counter()
+                response = self.session.get(url, timeout=self.api_timeout)
+                metrics.observe('lookup_api_seconds', time.perf_counter() - start,
+                                host=host, status=response.status_code)
+                
+                # Log response details
+                if logger.isEnabledFor(logging.DEBUG):
+                    response_details = {
+                        'status_code': response.status_code,
+                        'headers': dict(response.headers),
+                        'attempt': attempt + 1
+                    }
+                    logger.debug(f"API response details: {response_details}")
+                
+                if response.status_code == 200:
+                    return self._parse_product_data(response.json(), barcode_type)
+                    
+                elif response.status_code == 404:
+                    error_msg = 'Product not found in database'
+                    logger.warning(f"{error_msg}. Status code: 404")
+                    return {'error': error_msg}
+                
+                elif response.status_code == 429:  # Rate limiting
+                    metrics.inc('lookup_api_rate_limited_total', host=host)
+                    retry_after = parse_retry_after(response.headers.get('Retry-After'), self.retry_delay)
+                    logger.warning(f"Rate limited. Retrying after {retry_after:g} seconds")
+                    if self.rate_limiter is not None:
+                        # Pause this host for every process, not just this request
+                        self.rate_limiter.block(host, retry_after)
+                    if self._wait(retry_after, cancel_event):
+                        return {'error': 'Request cancelled'}
+                    continue
+                
+                else:
+                    error_msg = f'Unexpected status code: {response.status_code}'
+                    logger.error(f"{error_msg}. Response: {response.text}")
+                    if attempt < self.max_retries - 1:
+                        if self._wait(self.retry_delay, cancel_event):
+                            return {'error': 'Request cancelled'}
+                        continue
+                    return {'error': error_msg}
+                
+            except requests.exceptions.Timeout:
+                metrics.inc('lookup_api_errors_total', host=host, error='timeout')
+                error_msg = f"API request timed out (attempt {attempt + 1})"
+                logger.warning(error_msg)
+                if attempt < self.max_retries - 1:
+                    if self._wait(self.retry_delay, cancel_event):
+                        return {'error': 'Request cancelled'}
+                    continue
+                return {'error': 'API request timed out'}
+            
+            except requests.exceptions.ConnectionError:
+                metrics.inc('lookup_api_errors_total', host=host, error='connection')
+                error_msg = f"Connection error (attempt {attempt + 1})"
+                logger.error(error_msg)
+                if attempt < self.max_retries - 1:
+                    if self._wait(self.retry_delay, cancel_event):
+                        return {'error': 'Request cancelled'}
+                    continue
+                return {'error': 'Connection error'}
+            
+            except requests.exceptions.RequestException as e:
+                error_msg = f"Request error: {str(e)}"
+                logger.error(error_msg)
+                return {'error': error_msg}
+            
+            except Exception as e:
+                error_msg = f"Unexpected error: {str(e)}"
+                logger.error(error_msg)
+                return {'error': error_msg}
+        
+        error_msg = 'Failed to retrieve product information after multiple attempts'
+        logger.error(error_msg)
+        return {'error': error_msg}
+
+    def _parse_product_data(self, data, barcode_type):
+        """Extract product fields from a successful API response body"""
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"API response data: {data}")
+
+        if 'product' in data:
+            product = data['product']
+            result = {
+                'type': barcode_type,
+                'company': product.get('brands', 'Unknown'),
+                'product_name': product.get('product_name', 'Unknown'),
+                'category': product.get('categories', 'Unknown'),
+                'image_url': product.get('image_url', None)
+            }
+            logger.info(f"Successfully processed API response: {result}")
+            return result
+
+        error_msg = 'Product not found in database'
+        logger.warning(error_msg)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Response without product: {data}")
+        return {'error': error_msg}
+
+    def _lookup_inventory(self, barcode):
+        """Look up product in inventory system (placeholder implementation)"""
+        # This is a placeholder for inventory system integration
+        return {
+            'status': 'Not implemented',
+            'message': 'Inventory lookup system not integrated'
+        }
+
+    def locate_barcode_regions(self, image, max_regions=None):
+        """Find candidate barcode regions ranked by barcode-likeness
+
+        Returns a list of dicts with the padded bounding box ('bbox' as x, y, w, h in
+        image coordinates), a 'score', the dominant gradient 'angle' in degrees and
+        the 'rotations' worth trying for that orientation.
+        """
+        try:
+            gray = image if len(image.shape) == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+
+            # Work on a reduced copy, bar gradients survive downscaling
+            scale = min(1.0, self.localization_width / gray.shape[1])
+            if scale < 1.0:
+                gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+            # Apply Sobel edge detection
+            sobelx = cv2.Sobel(gray, cv2.CV_32F, 1, 0, ksize=3)
+            sobely = cv2.Sobel(gray, cv2.CV_32F, 0, 1, ksize=3)
+
+            # Calculate and normalize gradient magnitude
+            magnitude = cv2.magnitude(sobelx, sobely)
+            magnitude = cv2.normalize(magnitude, None, 0, 255, cv2.NORM_MINMAX, cv2.CV_8U)
+
+            # Smooth and threshold, then merge neighbouring bars into solid blobs
+            blurred = cv2.blur(magnitude, (9, 9))
+            _, binary = cv2.threshold(blurred, 50, 255, cv2.THRESH_BINARY)
+            binary = cv2.morphologyEx(binary, cv2.MORPH_CLOSE, np.ones((15, 15), np.uint8))
+            binary = cv2.erode(binary, None, iterations=4)
+            binary = cv2.dilate(binary, None, iterations=4)
+
+            # Find contours
+            contours, _ = cv2.findContours(binary, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+
+            # Structure tensor components for orientation and coherence
+            jxx = sobelx * sobelx
+            jyy = sobely * sobely
+            jxy = sobelx * sobely
+
+            regions = []
+            for contour in contours:
+                x, y, w, h = cv2.boundingRect(contour)
+                if max(w, h) / scale < self.min_barcode_size or min(w, h) < 8:
+                    continue
+
+                sxx = float(jxx[y:y + h, x:x + w].sum())
+                syy = float(jyy[y:y + h, x:x + w].sum())
+                sxy = float(jxy[y:y + h, x:x + w].sum())
+                if sxx + syy == 0:
+                    continue
+
+                # Parallel bars give a coherent gradient field, text and texture do not
+                coherence = np.sqrt((sxx - syy) ** 2 + 4 * sxy ** 2) / (sxx + syy)
+                density = cv2.contourArea(contour) / float(w * h)
+                score = coherence * density
+                if score < self.min_region_score:
+                    continue
+                angle = 0.5 * np.degrees(np.arctan2(2 * sxy, sxx - syy))
+
+                # Vertical bars (horizontal gradient) read as-is, horizontal bars need a quarter turn
+                rotations = [0, 180] if abs(angle) < 45 else [90, 270]
+
+                regions.append({
+                    'bbox': self._scale_bbox((x, y, w, h), scale, image.shape),
+                    'score': float(score),
+                    'angle': float(angle),
+                    'rotations': rotations
+                })
+
+            regions.sort(key=lambda r: r['score'], reverse=True)
+            return regions[:max_regions] if max_regions else regions
+        except Exception as e:
+            logger.error(f"Error in barcode localization: {str(e)}")
+            return []
+
+    def _scale_bbox(self, bbox, scale, shape, padding=0.15):
+        """Map a bounding box back to full resolution with a quiet-zone margin"""
+        x, y, w, h = [v / scale for v in bbox]
+        pad_x = w * padding + 10
+        pad_y = h * padding + 10
+        x0 = max(0, int(x - pad_x))
+        y0 = max(0, int(y - pad_y))
+        x1 = min(shape[1], int(x + w + pad_x))
+        y1 = min(shape[0], int(y + h + pad_y))
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def has_barcode_pattern(self, image):
+        """Check if the image contains a barcode-like pattern"""
+        return bool(self.locate_barcode_regions(image, max_regions=1))
@@ -0,0 +1,357 @@
+"""Strategy selection learned from past scans.
+
+LearnedStrategyScheduler describes every image it is asked to order
+strategies for with a few cheap features, computed on a 64-pixel-wide
+thumbnail: brightness histogram, mean brightness, contrast, gradient
+orientation histogram, edge strength and resolution. When a strategy
+decodes an image, its features and the strategy are stored (once per image,
+and not for re-reads of tracked regions). New images are
+matched against that history (k nearest neighbours) and the strategies that
+worked on the most similar images are tried first; the hit-rate order of
+StrategyScheduler follows for the rest. With a fixed camera, where images
+look alike from one scan to the next, most scans then succeed on the first
+decode attempt.
+
+The history is kept in a ring of max_samples entries and saved to disk from
+a background thread every save_every new samples, so it carries over
+between runs without slowing down the decode that triggered the save:
+
+    scanner = BarcodeScanner(strategy_scheduler=LearnedStrategyScheduler())
+
+    python strategy_model.py            # summarize the saved history
+"""
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+from collections import Counter, deque
+from contextlib import contextmanager
+
+try:
+    import fcntl  # serializes saves across processes; not available on Windows
+except ImportError:
+    fcntl = None
+
+from lazy_imports import lazy_import
+from scanner_core import StrategyScheduler, strategy_name
+
+cv2 = lazy_import('cv2')
+np = lazy_import('numpy')
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'barcode_scanner', 'strategy_model.npz')
+
+FEATURE_WIDTH = 64  # thumbnail width the features are computed on
+BRIGHTNESS_BINS = 8
+ORIENTATION_BINS = 4
+FEATURE_SIZE = BRIGHTNESS_BINS + ORIENTATION_BINS + 5
+
+
+def image_features(image):
+    """Feature vector (float32) describing an image's lighting, contrast, texture and size"""
+    height, width = image.shape[:2]
+    thumb_height = max(1, height * FEATURE_WIDTH // width)
+    thumbnail = cv2.resize(image, (FEATURE_WIDTH, thumb_height), interpolation=cv2.INTER_AREA)
+    if thumbnail.ndim == 3:
+        thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+    gray = thumbnail.astype(np.float32)
+
+    brightness = np.bincount(thumbnail.ravel() // (256 // BRIGHTNESS_BINS),
+                             minlength=BRIGHTNESS_BINS) / thumbnail.size
+
+    # Gradient orientation histogram (0, 45, 90, 135 degrees), weighted by magnitude
+    gx = cv2.Sobel(gray, cv2.CV_32F, 1, 0)
+    gy = cv2.Sobel(gray, cv2.CV_32F, 0, 1)
+    magnitude, angle = cv2.cartToPolar(gx, gy, angleInDegrees=True)
+    bins = ((angle + 22.5) % 180 // 45).astype(np.int64).ravel()
+    orientation = np.bincount(bins, weights=magnitude.ravel(), minlength=ORIENTATION_BINS)[:ORIENTATION_BINS]
+    total = orientation.sum()
+    if total > 0:
+        orientation = orientation / total
+
+    return np.concatenate([
+        brightness,
+        orientation,
+        [gray.mean() / 255,  # brightness
+         gray.std() / 128,  # contrast
+         min(1.0, float(magnitude.mean()) / 255),  # edge strength
+         np.log2(width) / 12,  # resolution
+         height / width / 2]  # aspect ratio
+    ]).astype(np.float32)
+
+
+class StrategyModel:
+    """k-nearest-neighbour predictor of the strategy that decodes an image"""
+
+    def __init__(self, k=7, max_samples=5000, min_samples=10):
+        self.k = k  # neighbours consulted per prediction
+        self.max_samples = max_samples  # history size; the oldest samples are overwritten
+        self.min_samples = min_samples  # samples needed before predicting anything
+        self._lock = threading.Lock()
+        self._features = np.zeros((max_samples, FEATURE_SIZE), np.float32)
+        self._labels = np.zeros(max_samples, np.int32)  # index into self._names
+        self._names = []  # strategy names seen so far
+        self._count = 0  # samples stored (at most max_samples)
+        self._next = 0  # ring position of the next sample
+        self._unsaved = deque(maxlen=max_samples)  # (features, name) added since the last save
+
+    def __len__(self):
+        return self._count
+
+    def add(self, features, name):
+        """Remember that the strategy called name decoded an image with these features"""
+        with self._lock:
+            self._append(features, name)
+            self._unsaved.append((features, name))
+
+    def _append(self, features, name):
+        if name not in self._names:
+            self._names.append(name)
+        self._features[self._next] = features
+        self._labels[self._next] = self._names.index(name)
+        self._next = (self._next + 1) % self.max_samples
+        self._count = min(self._count + 1, self.max_samples)
+
+    def predict(self, features):
+        """Strategy names ranked by distance-weighted votes of the nearest samples"""
+        with self._lock:
+            if self._count < self.min_samples:
+                return []
+            distances = np.linalg.norm(self._features[:self._count] - features, axis=1)
+            k = min(self.k, self._count)
+            nearest = np.argpartition(distances, k - 1)[:k]
+            votes = Counter()
+            for index in nearest:
+                votes[self._names[self._labels[index]]] += 1.0 / (distances[index] + 1e-3)
+            return [name for name, _ in votes.most_common()]
+
+    def save(self, path):
+        """Append the samples added since the last save to the history at path
+
+        Other processes (and other models in this one) save to the same file,
+        so the file is read back, the new samples are appended (oldest dropped
+        beyond max_samples) and the result replaces the file atomically. This
+        model then holds the merged history, including the others' samples.
+        """
+        with self._lock:
+            new = list(self._unsaved)
+            self._unsaved.clear()
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        try:
+            with _file_lock(path):
+                features, labels = _read_history(path)
+                if new:
+                    features = np.concatenate([features, np.array([f for f, _ in new], np.float32)])
+                    labels = np.concatenate([labels, np.array([n for _, n in new], dtype=str)])
+                features, labels = features[-self.max_samples:], labels[-self.max_samples:]
+                fd, temp_path = tempfile.mkstemp(prefix='.strategy_model.', suffix='.npz', dir=directory)
+                try:
+                    with os.fdopen(fd, 'wb') as f:
+                        np.savez_compressed(f, features=features, labels=labels)
+                    os.replace(temp_path, path)
+                except BaseException:
+                    os.unlink(temp_path)
+                    raise
+        except BaseException:
+            # Keep the samples for the next attempt
+            with self._lock:
+                self._unsaved.extendleft(reversed(new))
+            raise
+
+        with self._lock:
+            # Rebuild the ring from the merged history plus anything added meanwhile
+            pending = list(self._unsaved)
+            self._names, self._count, self._next = [], 0, 0
+            for row, name in zip(features, labels):
+                self._append(row, str(name))
+            for row, name in pending:
+                self._append(row, name)
+
+    def load(self, path):
+        """Add the samples saved at path; returns how many were loaded"""
+        features, labels = _read_history(path, strict=True)
+        with self._lock:
+            for row, name in zip(features[-self.max_samples:], labels[-self.max_samples:]):
+                self._append(row, str(name))
+        return min(len(features), self.max_samples)
+
+    def label_counts(self):
+        """Number of stored samples per strategy name"""
+        with self._lock:
+            return Counter(self._names[i] for i in self._labels[:self._count])
+
+
+def _read_history(path, strict=False):
+    """(features, labels) saved at path; empty if there is no usable file (strict raises instead)"""
+    empty = np.zeros((0, FEATURE_SIZE), np.float32), np.zeros(0, dtype=str)
+    if not strict and not os.path.exists(path):
+        return empty
+    try:
+        with np.load(path) as data:
+            features, labels = data['features'], data['labels']
+    except (OSError, ValueError, KeyError) as e:
+        if strict:
+            raise
+        logger.warning(f"Replacing unreadable strategy history {path}: {str(e)}")
+        return empty
+    if features.ndim != 2 or features.shape[1] != FEATURE_SIZE:
+        logger.warning(f"Ignoring strategy history with incompatible features: {path}")
+        return empty
+    return features.astype(np.float32), labels.astype(str)
+
+
+@contextmanager
+def _file_lock(path):
+    """Hold an exclusive lock on path + '.lock' (a no-op without fcntl)"""
+    if fcntl is None:
+        yield
+        return
+    with open(f"{path}.lock", 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class LearnedStrategyScheduler(StrategyScheduler):
+    """StrategyScheduler that puts the strategies predicted from image features first"""
+
+    def __init__(self, strategies=None, window=50, model_path=DEFAULT_MODEL_PATH, model=None,
+                 max_predicted=3, save_every=25):
+        super().__init__(strategies, window)
+        self.model = model or StrategyModel()
+        self.model_path = model_path  # None keeps the history in memory only
+        self.max_predicted = max_predicted  # predicted strategies moved to the front
+        self.save_every = save_every  # new samples between saves
+        self._by_name = {strategy_name(*s): s for s in self.strategies}
+        self._unsaved = 0
+        self._saving = False  # a background save is running
+        self._save_lock = threading.Lock()
+        self._counters = {'scans': 0, 'predicted': 0, 'first_try': 0, 'successes': 0, 'attempts': 0}
+        if model_path and os.path.exists(model_path):
+            try:
+                loaded = self.model.load(model_path)
+                logger.info(f"Loaded {loaded} strategy samples from {model_path}")
+            except (OSError, ValueError, KeyError) as e:
+                logger.warning(f"Could not load strategy history from {model_path}: {str(e)}")
+
+    def features(self, image):
+        # Called once per scanned image, so this is where scans are counted
+        try:
+            features = {'vector': image_features(image), 'predicted': None, 'attempts': 0, 'decoded': False,
+                        'sampled': False}
+        except Exception as e:
+            logger.debug(f"Could not compute image features: {str(e)}")
+            return None
+        with self._lock:
+            self._counters['scans'] += 1
+        return features
+
+    def order(self, rotations=None, features=None):
+        strategies = super().order(rotations)
+        if features is None:
+            return strategies
+        if features['predicted'] is None:
+            # Regions of one image share its features, so predict once per image
+            features['predicted'] = self.model.predict(features['vector'])
+            if features['predicted']:
+                with self._lock:
+                    self._counters['predicted'] += 1
+        allowed = set(strategies)
+        predicted = [self._by_name[name] for name in features['predicted']
+                     if self._by_name.get(name) in allowed][:self.max_predicted]
+        if predicted:
+            strategies = predicted + [s for s in strategies if s not in predicted]
+        return strategies
+
+    def record_attempt(self, features):
+        if features is None:
+            return
+        with self._lock:
+            self._counters['attempts'] += 1
+            features['attempts'] += 1
+
+    def record_success(self, features, strategy, sample=True):
+        if features is None:
+            return
+        with self._lock:
+            # Passes over regions of one image can each succeed; the image counts once
+            if not features['decoded']:
+                features['decoded'] = True
+                self._counters['successes'] += 1
+                if features['attempts'] == 1:
+                    self._counters['first_try'] += 1
+            if not sample or features['sampled']:
+                return
+            features['sampled'] = True
+        self.model.add(features['vector'], strategy_name(*strategy))
+        with self._lock:
+            self._unsaved += 1
+            save = self.model_path and self._unsaved >= self.save_every and not self._saving
+            if save:
+                self._unsaved = 0
+                self._saving = True
+        if save:
+            # Called on a decode thread; writing the file is not its job
+            threading.Thread(target=self._background_save, name='strategy-model-save', daemon=True).start()
+
+    def save(self):
+        """Write the strategy history to model_path"""
+        if not self.model_path:
+            return
+        with self._save_lock:
+            try:
+                self.model.save(self.model_path)
+            except OSError as e:
+                logger.warning(f"Could not save strategy history to {self.model_path}: {str(e)}")
+
+    def _background_save(self):
+        try:
+            self.save()
+        finally:
+            with self._lock:
+                self._saving = False
+
+    def get_model_stats(self):
+        """How often predictions were made and how many decode attempts a success took
+
+        Counts are per scanned image: first_try is the images decoded by their
+        first attempt, and attempts include misses on downscaled pyramid levels.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+        stats['samples'] = len(self.model)
+        stats['first_try_rate'] = stats['first_try'] / stats['successes'] if stats['successes'] else 0.0
+        stats['attempts_per_success'] = stats['attempts'] / stats['successes'] if stats['successes'] else 0.0
+        return stats
+
+    def reset(self):
+        super().reset()
+        with self._lock:
+            for name in self._counters:
+                self._counters[name] = 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize the saved strategy history")
+    parser.add_argument('--model', default=DEFAULT_MODEL_PATH, help="Strategy history file")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.model):
+        print(f"No strategy history at {args.model}", file=sys.stderr)
+        return 1
+    model = StrategyModel()
+    loaded = model.load(args.model)
+    print(f"{loaded} samples in {args.model}")
+    for name, count in model.label_counts().most_common():
+        print(f"{name:28} {count:6d} ({count / loaded:.1%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
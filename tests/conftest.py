@@ -0,0 +1,84 @@
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+# The modules live at the top of the repository, not in a package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class StubServer:
+    """Local HTTP server answering each path from a queue of canned responses
+
+    reply(path, status, body, headers, delay) queues one response; the last
+    response queued for a path is repeated once the queue is down to it.
+    Unknown paths get 404. requests lists (path, time) of every request.
+    """
+
+    def __init__(self):
+        self._responses = defaultdict(deque)
+        self._lock = threading.Lock()
+        self.requests = []
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                status, body, headers, delay = stub._next(self.path)
+                if delay:
+                    time.sleep(delay)
+                data = body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    @property
+    def host(self):
+        return f"127.0.0.1:{self._server.server_address[1]}"
+
+    def url(self, path):
+        return f"http://{self.host}{path}"
+
+    def reply(self, path, status=200, body='{}', headers=None, delay=0.0):
+        with self._lock:
+            self._responses[path].append((status, body, headers or {}, delay))
+
+    def count(self, path):
+        with self._lock:
+            return sum(1 for p, _ in self.requests if p == path)
+
+    def _next(self, path):
+        with self._lock:
+            self.requests.append((path, time.monotonic()))
+            responses = self._responses.get(path)
+            if not responses:
+                return 404, '{}', {}, 0.0
+            return responses.popleft() if len(responses) > 1 else responses[0]
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
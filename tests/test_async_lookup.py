@@ -0,0 +1,53 @@
+import asyncio
+import json
+import time
+
+import pytest
+
+from async_lookup import AsyncProductLookup
+from rate_limiter import SharedRateLimiter
+from scanner_core import BarcodeScanner
+
+PRODUCT = json.dumps({'product': {'brands': 'Acme', 'product_name': 'Widget'}})
+
+
+@pytest.fixture
+def lookup():
+    scanner = BarcodeScanner(product_cache=False)
+    scanner.retry_delay = 0.01
+    scanner.api_timeout = 2
+    lookup = AsyncProductLookup(scanner)
+    yield lookup
+    lookup.close()
+
+
+def test_found_product_is_parsed(lookup, stub_server):
+    stub_server.reply('/first/ABC', body=PRODUCT)
+    result = asyncio.run(lookup._make_api_request(stub_server.url('/first/ABC'), 'CODE128'))
+    assert result['product_name'] == 'Widget'
+
+
+def test_non_json_body_is_an_error(lookup, stub_server):
+    stub_server.reply('/first/ABC', body='<html>maintenance</html>')
+    result = asyncio.run(lookup._make_api_request(stub_server.url('/first/ABC'), 'CODE128'))
+    assert result['error'].startswith('Request error')
+
+
+def test_cancelled_request_takes_no_token(lookup, stub_server, tmp_path):
+    limits = SharedRateLimiter(str(tmp_path / 'limits.db'), rates={stub_server.host: (1.0, 1)})
+    lookup.scanner.rate_limiter = limits
+    lookup.scanner.rate_limit_wait = 10
+    assert limits.acquire(stub_server.host)
+
+    async def cancel_while_waiting():
+        task = asyncio.ensure_future(lookup._make_api_request(stub_server.url('/first/ABC'), 'CODE128'))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(cancel_while_waiting())
+    # Long enough for the next token; a thread still waiting would have taken it
+    time.sleep(1.2)
+    assert limits.get_stats()['acquired'] == 1
+    assert stub_server.count('/first/ABC') == 0
@@ -0,0 +1,73 @@
+import random
+
+import numpy as np
+import pytest
+
+from gtin import check_digit, expand_upce, gtin14_many, is_valid_gtin, to_gtin14, to_product_code, validate_many
+
+
+def random_codes(count, seed=0):
+    """Codes of mixed lengths, about half with a correct check digit, some with non-digits"""
+    rng = random.Random(seed)
+    codes = []
+    for _ in range(count):
+        length = rng.choice([0, 1, 7, 8, 9, 12, 13, 14, 15, 30])
+        code = ''.join(rng.choice('0123456789') for _ in range(length))
+        if length > 1 and rng.random() < 0.5:
+            code = code[:-1] + str(check_digit(code[:-1]))
+        if code and rng.random() < 0.05:
+            code = code[:2] + rng.choice('a -٣é') + code[3:]
+        codes.append(code)
+    return codes
+
+
+def test_check_digits():
+    assert is_valid_gtin('4006381333931')  # EAN-13
+    assert is_valid_gtin('036000291452')  # UPC-A
+    assert is_valid_gtin('96385074')  # EAN-8
+    assert is_valid_gtin('00036000291452')  # GTIN-14
+    assert not is_valid_gtin('4006381333932')
+    assert not is_valid_gtin('40063813339')  # 11 digits
+
+
+def test_upce_expansion():
+    assert expand_upce('01234565') == '012345000065'
+    assert expand_upce('01234566') is None  # wrong check digit
+    assert to_gtin14('01234565', 'UPCE') == '00012345000065'
+
+
+def test_product_codes():
+    assert to_product_code('00036000291452') == '0036000291452'
+    assert to_product_code('036000291452') == '0036000291452'
+    assert to_product_code('96385074') == '96385074'
+    assert to_product_code('10036000291459') == '10036000291459'
+    assert to_product_code('01234565', 'UPC_E') == '0012345000065'
+    assert to_product_code('4006381333932') is None
+
+
+def test_validate_many_matches_is_valid_gtin():
+    codes = random_codes(20000) + ['', ' 96385074', '٩٦٣٨٥٠٧٤']
+    expected = np.array([is_valid_gtin(code) for code in codes])
+    assert expected.any() and not expected.all()
+    np.testing.assert_array_equal(validate_many(codes), expected)
+
+
+@pytest.mark.parametrize('codes', [[], np.array([], dtype=str).reshape(0, 3)])
+def test_validate_many_empty(codes):
+    assert validate_many(codes).shape == np.asarray(codes).shape
+
+
+def test_validate_many_keeps_the_shape():
+    codes = np.array([['4006381333931', 'x'], ['96385074', '96385075']])
+    np.testing.assert_array_equal(validate_many(codes), [[True, False], [True, False]])
+
+
+def test_validate_many_ignores_long_padding():
+    # One long entry widens every string in the array
+    codes = ['4006381333931', '4006381333931' + '0' * 50]
+    np.testing.assert_array_equal(validate_many(codes), [True, False])
+
+
+def test_gtin14_many():
+    result = gtin14_many([' 036000291452 ', '96385074', 'bad', '4006381333932'])
+    assert list(result) == ['00036000291452', '00000096385074', '', '']
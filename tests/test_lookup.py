@@ -0,0 +1,116 @@
+import json
+import threading
+import time
+
+import pytest
+
+from product_cache import ProductCache
+from rate_limiter import SharedRateLimiter
+from scanner_core import BarcodeScanner
+
+PRODUCT = json.dumps({'product': {'brands': 'Acme', 'product_name': 'Widget', 'categories': 'Tools'}})
+
+
+@pytest.fixture
+def scanner(stub_server):
+    scanner = BarcodeScanner(product_cache=False)
+    scanner.retry_delay = 0.01
+    scanner.api_timeout = 2
+    # Point the CODE128 lookups at the stub instead of the public APIs
+    scanner._code128_endpoints = lambda barcode: [
+        {'url': stub_server.url(f'/first/{barcode}'), 'name': 'First'},
+        {'url': stub_server.url(f'/second/{barcode}'), 'name': 'Second'},
+    ]
+    return scanner
+
+
+def test_found_product_is_parsed(scanner, stub_server):
+    stub_server.reply('/first/ABC', body=PRODUCT)
+    result = scanner.get_product_info('ABC', 'CODE128')
+    assert result['company'] == 'Acme'
+    assert result['product_name'] == 'Widget'
+    assert result['type'] == 'CODE128'
+
+
+def test_sequential_lookup_falls_through_not_found(scanner, stub_server):
+    stub_server.reply('/first/ABC', status=404)
+    stub_server.reply('/second/ABC', body=PRODUCT)
+    result = scanner.get_product_info('ABC', 'CODE128')
+    assert result['product_name'] == 'Widget'
+    assert stub_server.count('/first/ABC') == 1
+
+
+def test_not_found_everywhere(scanner, stub_server):
+    stub_server.reply('/first/ABC', status=404)
+    stub_server.reply('/second/ABC', body='{"status": 0}')  # 200 without a product
+    result = scanner.get_product_info('ABC', 'CODE128')
+    assert result['error'] == 'Product not found in any database'
+    assert result['details']['errors'] == {'First': 'Product not found in database',
+                                           'Second': 'Product not found in database'}
+
+
+def test_not_found_is_cached(stub_server, scanner):
+    scanner.product_cache = ProductCache()
+    stub_server.reply('/first/ABC', status=404)
+    stub_server.reply('/second/ABC', status=404)
+    first = scanner.get_product_info('ABC', 'CODE128')
+    second = scanner.get_product_info('ABC', 'CODE128')
+    assert first == second
+    assert stub_server.count('/first/ABC') == 1
+
+
+def test_fan_out_returns_the_first_product_found(scanner, stub_server):
+    scanner.lookup_mode = 'concurrent'
+    stub_server.reply('/first/ABC', body=PRODUCT, delay=1.0)
+    stub_server.reply('/second/ABC', body=json.dumps({'product': {'product_name': 'Fast'}}))
+    start = time.monotonic()
+    result = scanner.get_product_info('ABC', 'CODE128')
+    assert result['product_name'] == 'Fast'
+    assert time.monotonic() - start < 0.8  # did not wait for the slow endpoint
+
+
+def test_fan_out_queries_every_endpoint_at_once(scanner, stub_server):
+    scanner.lookup_mode = 'concurrent'
+    stub_server.reply('/first/ABC', status=404, delay=0.3)
+    stub_server.reply('/second/ABC', status=404, delay=0.3)
+    start = time.monotonic()
+    result = scanner.get_product_info('ABC', 'CODE128')
+    assert result['error'] == 'Product not found in any database'
+    assert set(result['details']['errors']) == {'First', 'Second'}
+    assert time.monotonic() - start < 0.55  # both delays overlapped
+
+
+def test_429_waits_for_retry_after(scanner, stub_server):
+    stub_server.reply('/first/ABC', status=429, headers={'Retry-After': '0.3'})
+    stub_server.reply('/first/ABC', body=PRODUCT)
+    result = scanner._make_api_request(stub_server.url('/first/ABC'), 'CODE128')
+    assert result['product_name'] == 'Widget'
+    (_, first), (_, second) = stub_server.requests
+    assert second - first >= 0.3
+
+
+def test_429_pauses_the_host_for_every_process(scanner, stub_server, tmp_path):
+    scanner.rate_limiter = SharedRateLimiter(str(tmp_path / 'limits.db'), rates={})
+    stub_server.reply('/first/ABC', status=429, headers={'Retry-After': '30'})
+    cancel_event = threading.Event()
+    threading.Timer(0.2, cancel_event.set).start()
+    result = scanner._make_api_request(stub_server.url('/first/ABC'), 'CODE128', cancel_event)
+    assert result == {'error': 'Request cancelled'}
+    # A second limiter on the same file stands for another process
+    other = SharedRateLimiter(str(tmp_path / 'limits.db'), rates={})
+    assert other.get_state()[stub_server.host]['blocked_for'] > 25
+    assert not other.acquire(stub_server.host, max_wait=0)
+
+
+def test_repeated_429_gives_up(scanner, stub_server):
+    scanner.max_retries = 2
+    stub_server.reply('/first/ABC', status=429, headers={'Retry-After': '0'})
+    result = scanner._make_api_request(stub_server.url('/first/ABC'), 'CODE128')
+    assert result['error'] == 'Failed to retrieve product information after multiple attempts'
+    assert stub_server.count('/first/ABC') == 2
+
+
+def test_non_json_body_is_an_error(scanner, stub_server):
+    stub_server.reply('/first/ABC', body='<html>maintenance</html>')
+    result = scanner._make_api_request(stub_server.url('/first/ABC'), 'CODE128')
+    assert result['error'].startswith('Request error')
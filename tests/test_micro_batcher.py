@@ -0,0 +1,90 @@
+import threading
+from concurrent.futures import Future
+
+import pytest
+
+from scan_service import MicroBatcher, Overloaded, ServiceStopped
+
+
+def immediate(function):
+    """run_batch that applies function to every item and returns a finished Future"""
+    batches = []
+
+    def run_batch(items):
+        batches.append(list(items))
+        future = Future()
+        future.set_result([function(item) for item in items])
+        return future
+
+    run_batch.batches = batches
+    return run_batch
+
+
+@pytest.fixture
+def batchers():
+    started = []
+    yield started
+    for batcher in started:
+        batcher.stop()
+
+
+def test_items_are_grouped_into_batches(batchers):
+    run_batch = immediate(lambda item: item * 2)
+    batcher = MicroBatcher('test', run_batch, max_batch_size=8, max_wait=0.2)
+    futures = [batcher.submit(i) for i in range(20)]
+    batchers.append(batcher.start())
+    assert [f.result(2) for f in futures] == [i * 2 for i in range(20)]
+    assert [len(batch) for batch in run_batch.batches] == [8, 8, 4]
+    assert batcher.get_stats()['batches'] == 3
+
+
+def test_a_lone_item_waits_at_most_max_wait(batchers):
+    batcher = MicroBatcher('test', immediate(str), max_wait=0.01)
+    batchers.append(batcher.start())
+    assert batcher.submit(1).result(1) == '1'
+
+
+def test_full_queue_raises_overloaded(batchers):
+    started = threading.Event()
+    pending = []
+
+    def run_batch(items):
+        future = Future()
+        pending.append(future)
+        started.set()
+        return future
+
+    batcher = MicroBatcher('test', run_batch, max_batch_size=1, max_wait=0, max_pending=2, max_in_flight=1)
+    batchers.append(batcher.start())
+    futures = [batcher.submit(1)]
+    # Wait for the only slot to be taken, then fill the queue
+    assert started.wait(1)
+    futures += [batcher.submit(2), batcher.submit(3)]
+    with pytest.raises(Overloaded):
+        batcher.submit(4)
+    assert batcher.get_stats()['rejected'] == 1
+
+    pending[0].set_result(['done'])
+    assert futures[0].result(1) == 'done'
+
+
+def test_failed_batch_fails_its_items(batchers):
+    def run_batch(items):
+        raise RuntimeError('worker crashed')
+
+    batcher = MicroBatcher('test', run_batch, max_wait=0.01)
+    batchers.append(batcher.start())
+    future = batcher.submit(1)
+    with pytest.raises(RuntimeError, match='worker crashed'):
+        future.result(1)
+    assert batcher.get_stats()['failed_batches'] == 1
+
+
+def test_stop_fails_queued_items():
+    batcher = MicroBatcher('test', immediate(str))
+    future = batcher.submit(1)  # never started, so it stays queued
+    batcher.stop()
+    with pytest.raises(ServiceStopped):
+        future.result(1)
+    with pytest.raises(ServiceStopped):
+        batcher.submit(2)
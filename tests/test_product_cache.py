@@ -0,0 +1,73 @@
+import time
+
+from product_cache import ProductCache, normalize_barcode
+
+PRODUCT = {'type': 'EAN-13', 'product_name': 'Widget'}
+
+
+def test_miss_then_hit():
+    cache = ProductCache()
+    assert cache.get('key') is None
+    cache.set('key', PRODUCT)
+    assert cache.get('key') == PRODUCT
+    stats = cache.get_stats()
+    assert (stats['misses'], stats['memory_hits'], stats['stores']) == (1, 1, 1)
+
+
+def test_entries_survive_a_restart(tmp_path):
+    path = str(tmp_path / 'products.db')
+    cache = ProductCache(db_path=path)
+    cache.set('key', PRODUCT)
+    cache.close()
+
+    reopened = ProductCache(db_path=path)
+    assert reopened.get('key') == PRODUCT
+    assert reopened.get_stats()['disk_hits'] == 1
+
+
+def test_entries_expire():
+    cache = ProductCache(ttl=0.05)
+    cache.set('key', PRODUCT)
+    time.sleep(0.1)
+    assert cache.get('key') is None
+    assert cache.get_stats()['expirations'] == 1
+
+
+def test_negative_entries_use_the_shorter_ttl(tmp_path):
+    cache = ProductCache(db_path=str(tmp_path / 'products.db'), ttl=60, negative_ttl=0.05)
+    cache.set('found', PRODUCT)
+    cache.set('missing', {'error': 'Product not found in database'}, negative=True)
+    time.sleep(0.1)
+    assert cache.get('found') == PRODUCT
+    assert cache.get('missing') is None
+    assert cache.purge_expired() == 0  # already dropped by get
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = ProductCache(max_entries=2)
+    cache.set('a', PRODUCT)
+    cache.set('b', PRODUCT)
+    cache.get('a')
+    cache.set('c', PRODUCT)
+    assert cache.get('b') is None
+    assert cache.get('a') == PRODUCT
+    assert cache.get_stats()['evictions'] == 1
+
+
+def test_evicted_entries_are_still_on_disk(tmp_path):
+    cache = ProductCache(db_path=str(tmp_path / 'products.db'), max_entries=1)
+    cache.set('a', PRODUCT)
+    cache.set('b', PRODUCT)
+    assert cache.get('a') == PRODUCT
+    assert cache.get_stats()['disk_hits'] == 1
+
+
+def test_gtin_reads_of_one_product_share_a_key():
+    keys = {
+        normalize_barcode('036000291452', 'UPC_A'),
+        normalize_barcode('0036000291452', 'EAN13'),
+        normalize_barcode(' 036000291452 ', 'UPC_A'),
+    }
+    assert keys == {'00036000291452'}
+    assert normalize_barcode('01234565', 'UPC_E') == normalize_barcode('012345000065', 'UPC_A')
+    assert normalize_barcode('ABC-123', 'CODE128') == 'ABC-123'
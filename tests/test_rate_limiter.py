@@ -0,0 +1,61 @@
+import threading
+import time
+
+from rate_limiter import SharedRateLimiter
+
+HOST = 'api.example.com'
+
+
+def limiter(tmp_path, rate=10.0, burst=3):
+    return SharedRateLimiter(str(tmp_path / 'limits.db'), rates={HOST: (rate, burst)})
+
+
+def test_burst_then_refusal(tmp_path):
+    limits = limiter(tmp_path, rate=0.01)
+    assert all(limits.acquire(HOST, max_wait=0) for _ in range(3))
+    assert not limits.acquire(HOST, max_wait=0)
+    assert limits.get_stats()['refused'] == 1
+
+
+def test_waits_for_the_next_token(tmp_path):
+    limits = limiter(tmp_path, rate=10.0, burst=1)
+    assert limits.acquire(HOST)
+    start = time.monotonic()
+    assert limits.acquire(HOST, max_wait=1)
+    assert 0.05 < time.monotonic() - start < 0.5
+    assert limits.get_stats()['waited'] == 1
+
+
+def test_processes_share_the_bucket(tmp_path):
+    first = limiter(tmp_path, rate=0.01)
+    second = limiter(tmp_path, rate=0.01)
+    assert first.acquire(HOST, max_wait=0)
+    assert second.acquire(HOST, max_wait=0)
+    assert first.acquire(HOST, max_wait=0)
+    assert not second.acquire(HOST, max_wait=0)
+
+
+def test_block_pauses_every_limiter(tmp_path):
+    first = limiter(tmp_path)
+    second = limiter(tmp_path)
+    first.block(HOST, 30)
+    assert not second.acquire(HOST, max_wait=1)
+    assert second.get_state()[HOST]['blocked_for'] > 25
+
+
+def test_block_applies_to_hosts_without_a_rate(tmp_path):
+    limits = limiter(tmp_path)
+    assert limits.acquire('other.example.com', max_wait=0)
+    limits.block('other.example.com', 30)
+    assert not limits.acquire('other.example.com', max_wait=0)
+
+
+def test_cancel_event_stops_the_wait_without_a_token(tmp_path):
+    limits = limiter(tmp_path, rate=0.5, burst=1)
+    assert limits.acquire(HOST)
+    cancel_event = threading.Event()
+    threading.Timer(0.1, cancel_event.set).start()
+    start = time.monotonic()
+    assert not limits.acquire(HOST, max_wait=10, cancel_event=cancel_event)
+    assert time.monotonic() - start < 1
+    assert limits.get_stats()['acquired'] == 1
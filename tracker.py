@@ -0,0 +1,139 @@
+"""Temporal barcode tracking across video frames.
+
+BarcodeTracker remembers where each barcode was last seen and how fast it
+was moving. On the next frame it first tries to decode only the predicted
+region of every live track, and falls back to a full-frame search when a
+track is lost, when nothing is tracked, or every few frames to pick up
+newly arrived labels. Reports are debounced so a barcode sitting in view is
+reported (and looked up) once per debounce window.
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class BarcodeTracker:
+    """Predicted-ROI decoding with per-barcode debouncing"""
+
+    def __init__(self, scanner, debounce_seconds=5.0, track_ttl=1.0, margin=0.5, full_scan_every=10):
+        self.scanner = scanner
+        self.debounce_seconds = debounce_seconds  # minimum time between reports of one barcode
+        self.track_ttl = track_ttl  # seconds a track survives without a decode
+        self.margin = margin  # ROI growth around the predicted box, as a fraction of its size
+        self.full_scan_every = full_scan_every  # frames between forced full-frame searches
+        self._lock = threading.Lock()
+        self._tracks = {}  # (type, data) -> {'rect', 'velocity', 'last_seen'}
+        self._last_reported = {}  # (type, data) -> time of last report
+        self._frames = 0
+        self._counters = {'roi_hits': 0, 'roi_misses': 0, 'full_scans': 0, 'reported': 0, 'suppressed': 0}
+
+    def process(self, frame, timestamp=None, deadline=None):
+        """Decode a frame and return the symbols that should be reported now
+
+        A ScanDeadline bounds the whole frame, predicted regions included.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        with self._lock:
+            self._frames += 1
+            self._expire(timestamp)
+            predictions = {key: self._predict(track, timestamp, frame.shape)
+                           for key, track in self._tracks.items()}
+            force_full = not predictions or self._frames % self.full_scan_every == 0
+
+        # Decode each live track's predicted region first
+        features = self.scanner.strategy_scheduler.features(frame)  # once per frame, shared by every pass
+        symbols = []
+        lost = False
+        for key, bbox in predictions.items():
+            found = self.scanner.scan_region(frame, bbox, deadline=deadline, features=features)
+            if found:
+                symbols.extend(found)
+                self._count('roi_hits')
+            else:
+                lost = True
+                self._count('roi_misses')
+
+        # Search the full frame when a track was lost or nothing is tracked yet
+        if (force_full or lost) and not (deadline is not None and deadline.expired()):
+            self._count('full_scans')
+            symbols.extend(self.scanner.scan_all(frame, deadline, features))
+        elif deadline is not None:
+            # Only the tracked regions were searched; new labels may still be out there
+            deadline.partial = True
+
+        return self._update(symbols, timestamp)
+
+    def get_tracks(self, now=None):
+        """Live tracks (seen within track_ttl) keyed by (symbology, data)"""
+        now = time.time() if now is None else now
+        with self._lock:
+            return {key: dict(track) for key, track in self._tracks.items()
+                    if now - track['last_seen'] <= self.track_ttl}
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self._counters)
+            stats['tracks'] = len(self._tracks)
+            return stats
+
+    def reset(self):
+        with self._lock:
+            self._tracks.clear()
+            self._last_reported.clear()
+            self._frames = 0
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _expire(self, now):
+        for key in [k for k, t in self._tracks.items() if now - t['last_seen'] > self.track_ttl]:
+            del self._tracks[key]
+        for key in [k for k, t in self._last_reported.items() if now - t > self.debounce_seconds]:
+            del self._last_reported[key]
+
+    def _predict(self, track, now, shape):
+        """Expected bounding box of a track at time now, grown by the margin"""
+        x, y, w, h = track['rect']
+        dt = now - track['last_seen']
+        vx, vy = track['velocity']
+        x += vx * dt
+        y += vy * dt
+        pad_x = w * self.margin + 10
+        pad_y = h * self.margin + 10
+        x0 = max(0, int(x - pad_x))
+        y0 = max(0, int(y - pad_y))
+        x1 = min(shape[1], int(x + w + pad_x))
+        y1 = min(shape[0], int(y + h + pad_y))
+        return (x0, y0, max(1, x1 - x0), max(1, y1 - y0))
+
+    def _update(self, symbols, now):
+        """Refresh tracks with this frame's symbols and return the ones to report"""
+        report = []
+        with self._lock:
+            seen = set()
+            for symbol in symbols:
+                key = (symbol['type'], symbol['data'])
+                if key in seen:
+                    continue
+                seen.add(key)
+
+                # A worker may finish an older frame after a newer one; keep the newer position
+                track = self._tracks.get(key)
+                if track is None or now >= track['last_seen']:
+                    velocity = (0.0, 0.0)
+                    if track is not None and now > track['last_seen']:
+                        dt = now - track['last_seen']
+                        velocity = ((symbol['rect'][0] - track['rect'][0]) / dt,
+                                    (symbol['rect'][1] - track['rect'][1]) / dt)
+                    self._tracks[key] = {'rect': symbol['rect'], 'velocity': velocity, 'last_seen': now}
+
+                if key in self._last_reported:
+                    self._counters['suppressed'] += 1
+                    continue
+                self._last_reported[key] = now
+                self._counters['reported'] += 1
+                report.append(symbol)
+        return report
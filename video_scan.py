@@ -0,0 +1,250 @@
+"""Barcode scanning of recorded video and network streams.
+
+VideoSource reads a video file, an OpenCV-supported URL (RTSP, HTTP, ...) or
+a camera index, keeping only every stride-th frame and skipping frames that
+barely differ from the last frame kept. scan_video decodes those frames on a
+thread pool as fast as the CPU allows and yields a timestamped log entry the
+first time each barcode appears (again after debounce_seconds out of view).
+
+    python video_scan.py conveyor.mp4 --stride 2 --motion-threshold 2 --output log.csv
+
+A VideoSource can also stand in for the webcam in FramePipeline; with
+realtime=True it delivers frames at the recording's frame rate, which
+replays footage through the live pipeline as a repeatable load test.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from lazy_imports import lazy_import
+from scanner_core import BarcodeScanner, lookup_type
+from product_cache import ProductCache, DEFAULT_CACHE_PATH
+from rate_limiter import SharedRateLimiter
+
+cv2 = lazy_import('cv2')
+
+logger = logging.getLogger(__name__)
+
+LOG_FIELDS = ['timecode', 'time', 'frame', 'data', 'type', 'rect', 'product']
+
+
+def open_capture(source):
+    """Open a video file, stream URL or camera index (given as digits)"""
+    capture = cv2.VideoCapture(int(source) if str(source).isdigit() else source)
+    if not capture.isOpened():
+        raise IOError(f"Could not open video source: {source}")
+    return capture
+
+
+def format_timecode(seconds):
+    """HH:MM:SS.mmm for a position in seconds"""
+    millis = int(round(seconds * 1000))
+    hours, millis = divmod(millis, 3600000)
+    minutes, millis = divmod(millis, 60000)
+    return f"{hours:02d}:{minutes:02d}:{millis / 1000:06.3f}"
+
+
+class VideoSource:
+    """Frame reader with frame stride and motion-based skipping
+
+    read() follows the cv2.VideoCapture protocol, so a VideoSource can be
+    used wherever a capture is expected.
+    """
+
+    def __init__(self, source, stride=1, motion_threshold=0.0, motion_width=160, realtime=False):
+        self.source = source
+        self.capture = open_capture(source)
+        self.stride = max(1, stride)  # decode every stride-th frame
+        self.motion_threshold = motion_threshold  # mean gray-level change below which a frame is static
+        self.motion_width = motion_width  # width of the thumbnail compared for motion
+        self.realtime = realtime  # pace reads at the source frame rate, like a live camera
+        self.fps = self.capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_index = -1
+        self.finished = False
+        self._reference = None  # thumbnail of the last frame returned
+        self._started = time.monotonic()
+        self._counters = {'read': 0, 'returned': 0, 'stride_skipped': 0, 'static_skipped': 0}
+
+    def read(self):
+        """Next frame worth decoding as (ret, frame); ret is False at the end of the video"""
+        while True:
+            # grab() advances without converting the frame, which is all skipped frames need
+            if not self.capture.grab():
+                self.finished = True
+                return False, None
+            self.frame_index += 1
+            self._counters['read'] += 1
+            if self.frame_index % self.stride:
+                self._counters['stride_skipped'] += 1
+                continue
+
+            ret, frame = self.capture.retrieve()
+            if not ret:
+                self.finished = True
+                return False, None
+            if self._is_static(frame):
+                self._counters['static_skipped'] += 1
+                continue
+            self._counters['returned'] += 1
+            if self.realtime and self.fps > 0:
+                delay = self._started + self.frame_index / self.fps - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+            return True, frame
+
+    def frames(self):
+        """Yield (frame index, timestamp in seconds, frame) for every frame kept"""
+        while True:
+            ret, frame = self.read()
+            if not ret:
+                return
+            yield self.frame_index, self.timestamp(), frame
+
+    def timestamp(self):
+        """Position of the current frame in seconds (wall clock for live streams)"""
+        position = self.capture.get(cv2.CAP_PROP_POS_MSEC)
+        if position > 0:
+            return position / 1000
+        if self.fps > 0:
+            return self.frame_index / self.fps
+        return time.monotonic() - self._started
+
+    def get_stats(self):
+        return dict(self._counters)
+
+    def isOpened(self):
+        return self.capture.isOpened()
+
+    def set(self, prop, value):
+        return self.capture.set(prop, value)
+
+    def get(self, prop):
+        return self.capture.get(prop)
+
+    def release(self):
+        self.capture.release()
+
+    def _is_static(self, frame):
+        """Compare a small grayscale thumbnail with the last frame kept"""
+        if self.motion_threshold <= 0:
+            return False
+        height = max(1, frame.shape[0] * self.motion_width // frame.shape[1])
+        thumbnail = cv2.resize(frame, (self.motion_width, height), interpolation=cv2.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        if self._reference is not None and cv2.absdiff(thumbnail, self._reference).mean() < self.motion_threshold:
+            return True
+        self._reference = thumbnail
+        return False
+
+
+def scan_video(source, scanner=None, workers=None, debounce_seconds=2.0, lookup=False):
+    """Decode a VideoSource and yield log entries in frame order
+
+    Each barcode is logged when it first appears and again only after it
+    has been out of view for debounce_seconds of video time. Frames the
+    source skipped (stride, static scene) count as showing what the frame
+    decoded before them showed, so a barcode held still in view is not
+    logged again however long the scene stays static.
+    """
+    scanner = scanner or BarcodeScanner()
+    workers = workers or os.cpu_count() or 1
+    last_seen = {}  # (type, data) -> timestamp of the latest frame showing it
+    visible = set()  # symbols of the previous decoded frame
+
+    def entries(index, timestamp, symbols):
+        nonlocal visible
+        previously_visible, visible = visible, {(s['type'], s['data']) for s in symbols}
+        for symbol in symbols:
+            key = (symbol['type'], symbol['data'])
+            previous = last_seen.get(key)
+            last_seen[key] = timestamp
+            # In view on the previous decoded frame and every skipped frame since
+            if key in previously_visible:
+                continue
+            if previous is not None and timestamp - previous <= debounce_seconds:
+                continue
+            entry = {
+                'timecode': format_timecode(timestamp),
+                'time': round(timestamp, 3),
+                'frame': index,
+                'data': symbol['data'],
+                'type': symbol['type'],
+                'rect': symbol['rect']
+            }
+            if lookup:
+                product_info = scanner.get_product_info(symbol['data'], lookup_type(symbol['type']))
+                entry['product'] = product_info.get('product_name', product_info.get('error', ''))
+            yield entry
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='video-decode') as executor:
+        pending = deque()
+        for index, timestamp, frame in source.frames():
+            pending.append((index, timestamp, executor.submit(scanner.scan_all, frame)))
+            # Bound the frames held in memory; results are consumed in frame order
+            while len(pending) >= workers * 2:
+                index, timestamp, future = pending.popleft()
+                yield from entries(index, timestamp, future.result())
+        while pending:
+            index, timestamp, future = pending.popleft()
+            yield from entries(index, timestamp, future.result())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Log the barcodes seen in a video file or stream")
+    parser.add_argument('source', help="Video file, stream URL (rtsp://, http://, ...) or camera index")
+    parser.add_argument('--output', '-o', help="Log file (.csv or .jsonl; default: JSONL on stdout)")
+    parser.add_argument('--stride', type=int, default=1, help="Decode every Nth frame (default: 1)")
+    parser.add_argument('--motion-threshold', type=float, default=0.0,
+                        help="Skip frames whose mean gray-level change is below this (0-255, default: off)")
+    parser.add_argument('--debounce', type=float, default=2.0,
+                        help="Seconds out of view before a barcode is logged again")
+    parser.add_argument('--workers', '-j', type=int, help="Decode threads (default: all cores)")
+    parser.add_argument('--lookup', action='store_true', help="Add the product name to each entry")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    source = VideoSource(args.source, args.stride, args.motion_threshold)
+    scanner = None
+    if args.lookup:
+        # Share cached products and API quotas with the other scanner processes on this host
+        scanner = BarcodeScanner(product_cache=ProductCache(db_path=DEFAULT_CACHE_PATH),
+                                 rate_limiter=SharedRateLimiter())
+    use_csv = args.output is not None and args.output.lower().endswith('.csv')
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    writer = csv.DictWriter(out, fieldnames=LOG_FIELDS) if use_csv else None
+    if writer:
+        writer.writeheader()
+
+    count = 0
+    start = time.perf_counter()
+    try:
+        for entry in scan_video(source, scanner, workers=args.workers, debounce_seconds=args.debounce,
+                                lookup=args.lookup):
+            if writer:
+                writer.writerow(entry)
+            else:
+                out.write(json.dumps(entry) + '\n')
+            out.flush()
+            count += 1
+    finally:
+        source.release()
+        if out is not sys.stdout:
+            out.close()
+
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    stats = source.get_stats()
+    print(f"Read {stats['read']} frames in {elapsed:.2f}s ({stats['read'] / elapsed:.1f} frames/sec), "
+          f"decoded {stats['returned']}, skipped {stats['stride_skipped']} by stride and "
+          f"{stats['static_skipped']} as static; logged {count} barcodes", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())